@@ -0,0 +1,102 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.player import players
+from herowars.player import save_player
+
+from herowars.configs import autosave_interval
+from herowars.configs import autosave_batch_size
+
+# Python
+from collections import deque
+import time
+
+# Source.Python
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'Autosave',
+    'autosave'
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class Autosave(object):
+    """Periodically saves the players whose data has changed.
+
+    Every interval the dirty players are queued, and each step saves
+    only a small batch of them, spreading the database writes over
+    several ticks. A player's unsaved progress is never older than
+    the interval plus the time it takes to go through the queue.
+    """
+
+    def __init__(self, interval=autosave_interval,
+                 batch_size=autosave_batch_size, step_interval=0.1):
+        """Initializes a new autosave scheduler.
+
+        Args:
+            interval: Seconds between the autosave rounds
+            batch_size: Players saved per step
+            step_interval: Seconds between the steps
+        """
+
+        self.interval = interval
+        self.batch_size = batch_size
+        self.step_interval = step_interval
+        self._queue = deque()
+        self._next_round = 0
+        self._tick_repeat = TickRepeat(self._step)
+
+    def start(self):
+        """Starts the autosaves."""
+
+        self._next_round = time.time() + self.interval
+        self._tick_repeat.start(self.step_interval, 0)
+
+    def stop(self):
+        """Stops the autosaves, dropping the queued players."""
+
+        self._tick_repeat.stop()
+        self._queue.clear()
+
+    def _step(self):
+        """Saves the next batch of queued players.
+
+        Starts a new round by queueing the dirty players
+        if the queue is empty and the interval has passed.
+        """
+
+        if not self._queue:
+            if time.time() < self._next_round:
+                return
+            self._next_round = time.time() + self.interval
+            self._queue.extend(player for player in players if player.dirty)
+        for _ in range(min(self.batch_size, len(self._queue))):
+            player = self._queue.popleft()
+            if player in players and player.dirty:
+                save_player(player)
+
+    def flush(self):
+        """Saves every dirty player at once."""
+
+        self._queue.clear()
+        for player in players:
+            if player.dirty:
+                save_player(player)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+autosave = Autosave()
\ No newline at end of file
@@ -0,0 +1,203 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.configs import backup_directory
+from herowars.configs import backup_pages
+from herowars.configs import backup_step_delay
+from herowars.configs import backup_max_restarts
+
+# Python
+import os
+import sqlite3
+import threading
+import time
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'Backup',
+    'start_backup',
+    'get_backup'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+_backup = None
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class Backup(object):
+    """Online copy of a live SQLite database.
+
+    Uses SQLite's online backup API on a worker thread, copying a few
+    pages at a time so that the game thread can keep writing into the
+    database while the backup is being made. The finished file is
+    a consistent point-in-time snapshot of the database.
+
+    SQLite restarts the copy whenever another connection writes into
+    the database between two steps, so on a busy server the steps are
+    kept large, and the backup fails after max_restarts restarts
+    instead of copying forever.
+
+    Attributes:
+        source: Path to the database being copied
+        target: Path to the backup file
+        remaining: Pages left to copy
+        total: Total amount of pages in the database
+        restarts: Times writes have restarted the copy
+        error: Exception that stopped the backup, if any
+    """
+
+    def __init__(self, source, target, pages=backup_pages,
+                 step_delay=backup_step_delay,
+                 max_restarts=backup_max_restarts):
+        """Initializes a new backup.
+
+        Args:
+            source: Path to the database to copy
+            target: Path to the backup file
+            pages: Pages copied per step
+            step_delay: Seconds to sleep between the steps
+            max_restarts: Restarts after which the backup fails
+        """
+
+        self.source = source
+        self.target = target
+        self.pages = pages
+        self.step_delay = step_delay
+        self.max_restarts = max_restarts
+        self.remaining = 0
+        self.total = 0
+        self.restarts = 0
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def running(self):
+        """Is the backup still being made."""
+
+        return self._thread.is_alive()
+
+    @property
+    def progress(self):
+        """Gets the progress of the backup.
+
+        Returns:
+            Copied portion of the database between 0.0 and 1.0
+        """
+
+        if self.finished and not self.error:
+            return 1.0
+        if not self.total:
+            return 0.0
+        return (self.total - self.remaining) / self.total
+
+    def start(self):
+        """Starts copying the database on a worker thread."""
+
+        self.started = time.time()
+        self._thread.start()
+
+    def _progress(self, status, remaining, total):
+        """Stores the progress and yields between the steps.
+
+        Raises:
+            RuntimeError: If writes have restarted the copy too often
+        """
+
+        if self.total and remaining > self.remaining:
+            self.restarts += 1
+            if self.restarts > self.max_restarts:
+                raise RuntimeError(
+                    'Restarted {0} times by writes into the database.'.format(
+                        self.restarts))
+        self.remaining = remaining
+        self.total = total
+        if self.step_delay:
+            time.sleep(self.step_delay)
+
+    def _run(self):
+        """Copies the database into the target file."""
+
+        partial = self.target + '.part'
+        try:
+            source = sqlite3.connect(self.source)
+            target = sqlite3.connect(partial)
+            try:
+                source.backup(target, pages=self.pages,
+                              progress=self._progress)
+            finally:
+                target.close()
+                source.close()
+            os.replace(partial, self.target)
+        except Exception as error:
+            self.error = error
+            if os.path.exists(partial):
+                os.remove(partial)
+        finally:
+            self.finished = time.time()
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def snapshot_path(directory=backup_directory):
+    """Gets a timestamped path for a new snapshot.
+
+    Args:
+        directory: Directory to put the snapshot in
+
+    Returns:
+        Path to the snapshot file
+    """
+
+    return os.path.join(
+        directory, time.strftime('herowars-%Y%m%d-%H%M%S.db')
+    )
+
+
+def start_backup(database_file, target=None):
+    """Starts a new online backup unless one is already running.
+
+    Args:
+        database_file: Path to the database file to back up
+        target: Path to the backup file, a timestamped snapshot
+            in the backup directory by default
+
+    Returns:
+        The started backup
+
+    Raises:
+        RuntimeError: If a backup is already running
+    """
+
+    global _backup
+    if _backup and _backup.running:
+        raise RuntimeError('A backup is already running.')
+    target = target or snapshot_path()
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _backup = Backup(database_file, target)
+    _backup.start()
+    return _backup
+
+
+def get_backup():
+    """Gets the latest backup, None if no backup has been made."""
+
+    return _backup
\ No newline at end of file
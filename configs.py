@@ -11,4 +11,65 @@ exp_values = dict(
 
 
 # Database file used by Hero Wars
-database_path = './herowars.db'
\ No newline at end of file
+database_path = './herowars.db'
+
+# Directory where database backups and snapshots are written
+backup_directory = './backups'
+
+# Database pages copied per backup step, larger steps finish between writes
+backup_pages = 1024
+
+# Seconds to sleep between backup steps, keeps the database available
+backup_step_delay = 0.01
+
+# Times a backup may be restarted by writes before it gives up
+backup_max_restarts = 20
+
+# Days after which players who haven't been seen get pruned
+inactive_days = 365
+
+# Rows deleted per pruning step, one step per tick repeat
+prune_batch_size = 500
+
+# Database to archive pruned rows into, None to only delete them
+prune_archive_path = None
+
+# Pages freed per incremental vacuum step after pruning
+vacuum_pages = 128
+
+# Seconds between autosaves, bounds the progress lost in a crash
+autosave_interval = 60
+
+# Players saved per autosave step, steps run every few ticks
+autosave_batch_size = 2
+
+# Unix socket of the shared storage service, None to use the
+# database file directly (see storage_service.py)
+storage_socket = None
+
+# Snapshot of the online players written on unload and read on the
+# next load, preferably on tmpfs
+handoff_path = '/dev/shm/herowars.handoff'
+
+# Seconds the snapshot stays usable before the database is used instead
+handoff_max_age = 120
+
+# Worker threads for skills' off-thread work (see workers.py)
+worker_threads = 2
+
+# Maximum amount of unfinished worker tasks
+worker_queue_size = 64
+
+# Seconds between the status effect passes, effects tick and expire
+# on these passes
+status_interval = 0.1
+
+# Seconds between the hero statistics flushes
+hero_stats_interval = 60
+
+# Seconds between writes of the gold ledger, bounds the gold lost
+# in a crash
+gold_flush_interval = 5
+
+# Seconds between folding the gold ledger into the players' gold
+gold_compact_interval = 300
\ No newline at end of file
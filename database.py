@@ -3,11 +3,26 @@
 # ======================================================================
 
 # Hero Wars
-from herowars.entities import Hero
-from herowars.tools import find_element
+from herowars.heroes import get_hero_class
+
+from herowars.storage import create_tables
+from herowars.storage import write_player
+from herowars.storage import write_hero
+from herowars.storage import read_player
+from herowars.storage import read_hero
+from herowars.storage import read_player_stats
+from herowars.storage import add_hero_stats
+from herowars.storage import append_gold
+from herowars.storage import compact_gold_ledger
+
+from herowars.storage_service import StorageClient
+from herowars.storage_service import StorageUnavailableError
+
+from herowars.configs import storage_socket
 
 # Python
 import sqlite3
+import time
 
 
 # ======================================================================
@@ -19,14 +34,139 @@ __all__ = (
     'load_player_data',
     'save_player_data',
     'save_hero_data',
-    'load_hero_data'
+    'load_hero_data',
+    'load_player_stats',
+    'save_hero_stats',
+    'save_gold_entries',
+    'compact_gold',
+    'pop_invalidations'
 )
 
 
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Seconds to use the database directly after losing the storage service
+RECONNECT_DELAY = 10
+
+_client = None
+_retry_at = 0
+
+# Returned by _call() when the storage service is unavailable
+_UNAVAILABLE = object()
+
+# Writes replayed directly when the storage service is lost
+_WRITES = {
+    'write_player': write_player,
+    'write_hero': write_hero,
+    'add_hero_stats': add_hero_stats,
+    'append_gold': append_gold,
+    'compact_gold_ledger': compact_gold_ledger
+}
+
+
 # ======================================================================
 # >> FUNCTIONS
 # ======================================================================
 
+def _get_client(database_file):
+    """Gets the storage service client if the service is in use.
+
+    After the service is lost, the database is used directly and
+    connecting is retried every RECONNECT_DELAY seconds.
+
+    Args:
+        database_file: Path to the database file, for replaying
+            the writes of a lost service
+
+    Returns:
+        Connected client or None when the database is used directly
+    """
+
+    global _client, _retry_at
+    if not storage_socket:
+        return None
+    if _client is not None and not _client.connected:
+        _lose_client(database_file)
+    if _client is None and time.time() >= _retry_at:
+        try:
+            _client = StorageClient(storage_socket)
+        except OSError as error:
+            print('[HW] Storage service unavailable: {0}'.format(error))
+            _retry_at = time.time() + RECONNECT_DELAY
+    return _client
+
+
+def _lose_client(database_file):
+    """Forgets a lost storage service client until the next retry.
+
+    The writes the service never acknowledged are written directly,
+    so none are lost with the service.
+
+    Args:
+        database_file: Path to the database file
+    """
+
+    global _client, _retry_at
+    if _client is None:
+        return
+    client, _client = _client, None
+    client.close()
+    _retry_at = time.time() + RECONNECT_DELAY
+    print('[HW] Lost the storage service, using the database directly.')
+    writes = client.take_unacknowledged()
+    if not writes:
+        return
+    with sqlite3.connect(database_file) as connection:
+        cursor = connection.cursor()
+        for op, args in writes:
+            try:
+                _WRITES[op](cursor, *args)
+            except (sqlite3.Error, TypeError, ValueError) as error:
+                print('[HW] Failed to replay {0}: {1}'.format(op, error))
+    print('[HW] Replayed {0} unacknowledged writes.'.format(len(writes)))
+
+
+def _send(database_file, op, *args):
+    """Sends a write to the storage service if it's available.
+
+    Returns:
+        True if sent, False if the database must be written directly
+    """
+
+    client = _get_client(database_file)
+    if client is None:
+        return False
+    try:
+        client.send(op, *args)
+    except StorageUnavailableError:
+        _lose_client(database_file)
+        return False
+    return True
+
+
+def _call(database_file, op, *args):
+    """Runs a read on the storage service if it's available.
+
+    Blocks the calling thread until the service answers, for at most
+    the client's timeout, after which the service is considered lost.
+
+    Returns:
+        Result of the read, _UNAVAILABLE if the database
+        must be read directly
+    """
+
+    client = _get_client(database_file)
+    if client is None:
+        return _UNAVAILABLE
+    try:
+        return client.call(op, *args)
+    except StorageUnavailableError:
+        _lose_client(database_file)
+        return _UNAVAILABLE
+
+
 def setup_database(database_file):
     """Creates the HW tables into the database if they don't exist.
 
@@ -34,43 +174,26 @@ def setup_database(database_file):
         database_file: Path to the database file
     """
 
+    if _call(database_file, 'create_tables') is not _UNAVAILABLE:
+        return
     with sqlite3.connect(database_file) as connection:
-        cursor = connection.cursor()
-        cursor.execute("""CREATE TABLE IF NOT EXISTS players (
-            steamid TEXT PRIMARY KEY,
-            gold INTEGER,
-            hero_cls_id TEXT
-        )""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS heroes (
-            steamid TEXT,
-            cls_id TEXT,
-            level INTEGER,
-            exp INTEGER,
-            PRIMARY KEY (steamid, cls_id)
-        )""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS skills (
-            steamid TEXT,
-            hero_cls_id TEXT,
-            cls_id TEXT,
-            level INTEGER,
-            PRIMARY KEY (steamid, hero_cls_id, cls_id)
-        )""")
+        create_tables(connection.cursor())
 
 
 def save_player_data(database_file, player):
     """Saves player's data into the database.
 
+    The player's gold is saved by the gold ledger instead.
+
     Args:
         database_file: Path to the database file
         player: Player whose data to save
     """
 
-    with sqlite3.connect(database_file) as connection:
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO players VALUES (?, ?, ?)",
-            (player.steamid, player.gold, player.hero.cls_id)
-        )
+    row = (player.steamid, player.hero.cls_id, int(time.time()))
+    if not _send(database_file, 'write_player', *row):
+        with sqlite3.connect(database_file) as connection:
+            write_player(connection.cursor(), *row)
     save_hero_data(database_file, player.steamid, player.hero)
 
 
@@ -83,17 +206,96 @@ def save_hero_data(database_file, steamid, hero):
         hero: Hero whose data to save
     """
 
+    row = (
+        steamid, hero.cls_id, hero.level, hero.exp,
+        [(skill.cls_id, skill.level) for skill in hero.skills]
+    )
+    if _send(database_file, 'write_hero', *row):
+        return
+    with sqlite3.connect(database_file) as connection:
+        write_hero(connection.cursor(), *row)
+
+
+def save_hero_stats(database_file, rows):
+    """Adds combat statistics onto the stored hero statistics.
+
+    All the rows are written in a single transaction.
+
+    Args:
+        database_file: Path to the database file
+        rows: List of (steamid, cls_id, kills, deaths, assists,
+            headshots, damage) tuples of amounts to add
+    """
+
+    if _send(database_file, 'add_hero_stats', rows):
+        return
+    with sqlite3.connect(database_file) as connection:
+        add_hero_stats(connection.cursor(), rows)
+
+
+def save_gold_entries(database_file, entries):
+    """Appends gold changes into the gold ledger.
+
+    Without the storage service, all the entries are written in
+    a single transaction.
+
+    Args:
+        database_file: Path to the database file
+        entries: List of (steamid, amount, reason, created) tuples
+    """
+
+    for i, entry in enumerate(entries):
+        if not _send(database_file, 'append_gold', *entry):
+            entries = entries[i:]  # The rest are written directly
+            break
+    else:
+        return
     with sqlite3.connect(database_file) as connection:
         cursor = connection.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO heroes VALUES (?, ?, ?, ?)",
-            (steamid, hero.cls_id, hero.level, hero.exp)
-        )
-        for skill in hero.skills:
-            cursor.execute(
-                "INSERT OR REPLACE INTO skills VALUES (?, ?, ?, ?)",
-                (steamid, hero.cls_id, skill.cls_id, skill.level)
-            )
+        for entry in entries:
+            append_gold(cursor, *entry)
+
+
+def compact_gold(database_file):
+    """Folds the gold ledger into the players' gold.
+
+    Safe to call from a worker thread.
+
+    Args:
+        database_file: Path to the database file
+
+    Returns:
+        Amount of entries folded, None with the storage service
+    """
+
+    if _send(database_file, 'compact_gold_ledger'):
+        return None
+    connection = sqlite3.connect(database_file)
+    try:
+        with connection:
+            return compact_gold_ledger(connection.cursor())
+    finally:
+        connection.close()
+
+
+def load_player_stats(database_file):
+    """Loads every player's total level from the database.
+
+    Reads the maintained player_stats table instead of aggregating
+    the heroes table.
+
+    Args:
+        database_file: Path to the database file
+
+    Returns:
+        List of (steamid, total_level) tuples
+    """
+
+    rows = _call(database_file, 'read_player_stats')
+    if rows is not _UNAVAILABLE:
+        return [tuple(row) for row in rows]
+    with sqlite3.connect(database_file) as connection:
+        return read_player_stats(connection.cursor())
 
 
 def load_player_data(database_file, player):
@@ -104,27 +306,23 @@ def load_player_data(database_file, player):
         player: Player whose data to load
     """
 
-    heroes = Hero.get_subclasses()
-    with sqlite3.connect(database_file) as connection:
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT gold, hero_cls_id FROM players WHERE steamid=?",
-            (player.steamid, )
-        )
-        gold, hero_cls_id = cursor.fetchone() or (0, None)
-        player.gold = gold
-        # Load heroes
-        cursor.execute(
-            "SELECT cls_id, level, exp FROM heroes WHERE steamid=?",
-            (player.steamid, )
-        )
-        for cls_id, level, exp in cursor.fetchall():
-            hero = find_element(heroes, 'cls_id', cls_id)(level, exp)
-            if hero:
-                load_hero_data(database_file, player.steamid, hero)
-                player.heroes.append(hero)
-                if cls_id == hero_cls_id:
-                    player._hero = hero
+    data = _call(database_file, 'read_player', player.steamid)
+    if data is _UNAVAILABLE:
+        with sqlite3.connect(database_file) as connection:
+            data = read_player(connection.cursor(), player.steamid)
+    gold, hero_cls_id, hero_rows, skill_rows = data
+    player._gold = gold  # Not a change, mustn't enter the ledger
+    skill_levels = {
+        (hero_id, cls_id): level for hero_id, cls_id, level in skill_rows
+    }
+    for cls_id, level, exp in hero_rows:
+        hero_cls = get_hero_class(cls_id)
+        if hero_cls and hero_cls.enabled:
+            hero = hero_cls(level, exp)
+            _set_skill_levels(hero, skill_levels)
+            player.heroes.append(hero)
+            if cls_id == hero_cls_id:
+                player._hero = hero
 
 
 def load_hero_data(database_file, steamid, hero):
@@ -136,19 +334,39 @@ def load_hero_data(database_file, steamid, hero):
         hero: Hero whose data to load
     """
 
-    with sqlite3.connect(database_file) as connection:
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT level, exp FROM heroes WHERE steamid=? AND cls_id=?",
-            (steamid, hero.cls_id)
-        )
-        hero.level, hero.exp = cursor.fetchone() or (0, 0)
-        for skill in hero.skills:
-            cursor.execute(
-                "SELECT level FROM skills "
-                "WHERE steamid=? AND hero_cls_id=? AND cls_id=?",
-                (steamid, hero.cls_id, skill.cls_id)
-            )
-            data = cursor.fetchone()
-            if data:
-                skill.level = data[0]
\ No newline at end of file
+    data = _call(database_file, 'read_hero', steamid, hero.cls_id)
+    if data is _UNAVAILABLE:
+        with sqlite3.connect(database_file) as connection:
+            data = read_hero(connection.cursor(), steamid, hero.cls_id)
+    level, exp, skill_rows = data
+    hero.level, hero.exp = level, exp
+    _set_skill_levels(hero, {
+        (hero.cls_id, cls_id): level for cls_id, level in skill_rows
+    })
+
+
+def _set_skill_levels(hero, skill_levels):
+    """Sets hero's skill levels from a dictionary.
+
+    Args:
+        hero: Hero whose skills to level
+        skill_levels: Dictionary of (hero_cls_id, cls_id) keys
+            and skill level values
+    """
+
+    for skill in hero.skills:
+        level = skill_levels.get((hero.cls_id, skill.cls_id))
+        if level is not None:
+            skill.level = level
+
+
+def pop_invalidations():
+    """Gets steamids whose data was changed by other servers.
+
+    Returns:
+        List of steamids, always empty without the storage service
+    """
+
+    if _client is not None:
+        return _client.pop_invalidations()
+    return []
\ No newline at end of file
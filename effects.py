@@ -0,0 +1,150 @@
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'EffectBatch',
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class _PlayerEffects(object):
+    """Accumulated effects on a single player."""
+
+    __slots__ = (
+        'damage', 'damage_percent', 'heal', 'heal_percent', 'armor',
+        'knockback', 'attacker', 'lethal'
+    )
+
+    def __init__(self):
+        self.attacker = None
+        self.lethal = False
+        self.damage = 0
+        self.damage_percent = 0
+        self.heal = 0
+        self.heal_percent = 0
+        self.armor = 0
+        self.knockback = None
+
+
+class EffectBatch(object):
+    """Collects skills' effects during an event and applies them once.
+
+    Instead of each skill writing into the players' health and armor,
+    skills add their contributions to the batch of the event (the
+    EventView's effects attribute), and the event handler resolves
+    the batch after every skill has run, writing each property of
+    each affected player at most once.
+
+    Dead players are skipped entirely, including a player killed
+    by the event the batch belongs to, so a killing blow's heals
+    or damage can't bring him back to 1 health.
+
+    Damage is lethal unless added with lethal=False. When a player's
+    health would drop to 0 or below, and any of his damage was lethal,
+    the damage is dealt through the engine's take_damage() instead of
+    setting his health, so he dies and the last attacker given to
+    damage() gets the kill.
+
+    The effects on a player are resolved in this order:
+        1. Flat damage and flat heals are summed separately
+        2. Percentages are summed and then multiply their sum:
+           damage * (100 + damage_percent) / 100, same for heals
+        3. Health changes by heals minus damage, either killing the
+           player or, with only non-lethal damage, staying at least 1
+        4. Flat armor changes are summed, armor staying at least 0
+        5. Knockback vectors are summed into one velocity push
+    So percentages never multiply each other, and a percentage only
+    affects the flat values of the same batch.
+    """
+
+    __slots__ = ('_effects', )
+
+    def __init__(self):
+        self._effects = {}
+
+    def _get(self, player):
+        """Gets a player's accumulated effects."""
+
+        effects = self._effects.get(player)
+        if effects is None:
+            effects = self._effects[player] = _PlayerEffects()
+        return effects
+
+    def damage(self, player, amount, attacker=None, lethal=True):
+        """Adds flat damage to a player.
+
+        Args:
+            player: Player to damage
+            amount: Amount of damage
+            attacker: Player credited with a kill, None for none
+            lethal: Can the damage kill the player
+        """
+
+        effects = self._get(player)
+        effects.damage += amount
+        if lethal:
+            effects.lethal = True
+        if attacker is not None:
+            effects.attacker = attacker
+
+    def damage_percent(self, player, percent):
+        """Increases (or decreases) the damage a player takes."""
+
+        self._get(player).damage_percent += percent
+
+    def heal(self, player, amount):
+        """Adds a flat heal to a player."""
+
+        self._get(player).heal += amount
+
+    def heal_percent(self, player, percent):
+        """Increases (or decreases) the heals a player gets."""
+
+        self._get(player).heal_percent += percent
+
+    def armor(self, player, amount):
+        """Adds flat armor to a player, negative to remove armor."""
+
+        self._get(player).armor += amount
+
+    def knockback(self, player, vector):
+        """Adds a knockback vector to a player."""
+
+        effects = self._get(player)
+        if effects.knockback is None:
+            effects.knockback = vector
+        else:
+            effects.knockback = effects.knockback + vector
+
+    def resolve(self):
+        """Applies the accumulated effects to the players.
+
+        The batch is emptied, so it can't be applied twice.
+        """
+
+        effects, self._effects = self._effects, {}
+        for player, player_effects in effects.items():
+            if player.dead or player.health <= 0:
+                continue
+            damage = player_effects.damage \
+                * (100 + player_effects.damage_percent) / 100
+            heal = player_effects.heal \
+                * (100 + player_effects.heal_percent) / 100
+            health_change = int(heal - damage)
+            if health_change:
+                health = player.health + health_change
+                if health <= 0 and player_effects.lethal:
+                    attacker = player_effects.attacker
+                    player.take_damage(
+                        -health_change, attacker_index=(
+                            attacker.index if attacker else None))
+                    continue
+                player.health = max(1, health)
+            if player_effects.armor:
+                player.armor = max(0, player.armor + player_effects.armor)
+            if player_effects.knockback is not None:
+                player.base_velocity = player_effects.knockback
\ No newline at end of file
@@ -19,7 +19,9 @@ __all___ = (
     'Hero',
     'Skill',
     'Passive',
-    'Item'
+    'Item',
+    'Modifier',
+    'Modifiers'
 )
 
 
@@ -57,6 +59,7 @@ class Entity(object):
     enabled = True
     required_level = 0
     allowed_users = tuple()
+    _owner = None  # Hero whose cached aggregates to invalidate
 
     @classproperty
     def cls_id(cls):
@@ -104,6 +107,8 @@ class Entity(object):
         elif level > self.max_level and self.max_level > 0:
             raise ValueError('Attempt to set an entity over it\'s max level.')
         self._level = level
+        if self._owner is not None:
+            self._owner._invalidate()
 
     @classmethod
     def get_subclasses(cls):
@@ -136,6 +141,7 @@ class Hero(Entity):
 
     Attributes:
         skills: List of hero object's skills
+        items: List of hero's items, see add_item() and remove_item()
         exp: Hero's experience points for gradually leveling up
         required_exp: Experience points required for hero to level up
 
@@ -161,13 +167,10 @@ class Hero(Entity):
 
         super().__init__(level)
         self._exp = exp
-        self.skills = [
-            skill() for skill in self.skill_set if skill.enabled
-        ]
-        self.passives = [
-            passive() for passive in self.passive_set if passive.enabled
-        ]
         self.items = []
+        self._modifiers = None
+        self._methods = {}
+        self.create_skills()
 
     @property
     def required_exp(self):
@@ -234,24 +237,103 @@ class Hero(Entity):
         used_skill_points = sum(skill.level for skill in self.skills)
         return self._level - used_skill_points
 
+    def create_skills(self):
+        """Creates the hero's skills and passives from its class' sets.
+
+        Replaces the current skills and passives with new ones at
+        level 0, e.g. after the hero's class has been reloaded.
+        """
+
+        self.skills = [
+            skill() for skill in self.skill_set if skill.enabled
+        ]
+        self.passives = [
+            passive() for passive in self.passive_set if passive.enabled
+        ]
+        for entity in self.skills + self.passives:
+            entity._owner = self
+        self._invalidate()
+
+    def add_item(self, item):
+        """Equips an item on the hero.
+
+        Args:
+            item: Item to equip
+        """
+
+        item._owner = self
+        self.items.append(item)
+        self._invalidate()
+
+    def remove_item(self, item):
+        """Removes an equipped item from the hero.
+
+        Args:
+            item: Item to remove
+
+        Raises:
+            ValueError: If the hero doesn't have the item
+        """
+
+        self.items.remove(item)
+        item._owner = None
+        self._invalidate()
+
+    def _get_active_entities(self):
+        """Gets the passives, the learned skills and the items."""
+
+        return (
+            self.passives
+            + [skill for skill in self.skills if skill.level]
+            + self.items
+        )
+
+    def _invalidate(self):
+        """Drops the cached modifiers and methods.
+
+        Called whenever the skills, passives, items or their levels
+        change, so reading the caches never has to check for changes.
+        """
+
+        self._modifiers = None
+        self._methods.clear()
+
+    @property
+    def modifiers(self):
+        """Gets the combined stat modifiers of the hero's entities.
+
+        The aggregate is recalculated only when passives, skills,
+        skill levels or items have changed.
+
+        Returns:
+            Modifiers of the passives, the learned skills and the items
+        """
+
+        if self._modifiers is None:
+            self._modifiers = Modifiers.combine(
+                self._get_active_entities())
+        return self._modifiers
+
     def execute_skills(self, method_name, game_event):
         """Executes hero's skills and passives.
 
         Calls each of hero's skills' and passives' execute() method with
-        the given game_event.
+        the given game_event. Entities without the method, such as
+        ones that only declare modifiers, are skipped without a call.
 
         Args:
             method_name: Name of the method to execute
-            game_event: Game event object containing event information
+            game_event: EventView of the game event (see herowars.eventview)
         """
 
-        for passive in self.passives:
-            passive.execute_method(method_name, game_event)
-        for skill in self.skills:
-            if skill.level:
-                skill.execute_method(method_name, game_event)
-        for item in self.items:
-            item.execute_method(method_name, game_event)
+        entities = self._methods.get(method_name)
+        if entities is None:
+            entities = self._methods[method_name] = [
+                entity for entity in self._get_active_entities()
+                if getattr(entity.__class__, method_name, None)
+            ]
+        for entity in entities:
+            entity.execute_method(method_name, game_event)
 
     @classmethod
     def skill(cls, skill_class):
@@ -297,6 +379,10 @@ class Skill(Entity):
     more versatile gameplay for Hero Wars. Each hero has a certain skill
     set, and each skill gets used during a certain event or action to
     create a bonus effect, such as damaging the enemy.
+
+    Class Attributes:
+        modifiers: Stat modifiers applied while the skill is active,
+            no methods are needed for plain stat bonuses
     """
 
     # Defaults
@@ -304,6 +390,7 @@ class Skill(Entity):
     description = 'This is a skill.'
     cost = 1
     max_level = 8
+    modifiers = tuple()
 
     def execute_method(self, method_name, game_event):
         """Executes skill's method.
@@ -313,7 +400,7 @@ class Skill(Entity):
 
         Args:
             method_name: Name of the method to execute
-            game_event: Game event object containing event information
+            game_event: EventView of the game event (see herowars.eventview)
         """
 
         method = getattr(self.__class__, method_name, None)
@@ -336,4 +423,88 @@ class Item(Skill):
     description = 'This is an item.'
     cost = 10
     permanent = False  # Stays after death?
-    limit = 0
\ No newline at end of file
+    limit = 0
+
+
+class Modifier(object):
+    """Declarative stat bonus of a skill, passive or item.
+
+    Declared in the entity's modifiers tuple, e.g.
+    modifiers = (Modifier('damage', percent=5), Modifier('armor', 10))
+
+    Attributes:
+        stat: Name of the modified stat, like 'damage' or 'armor'
+        flat: Value added to the stat
+        percent: Percentage the stat is increased by
+        per_level: Multiply flat and percent by the entity's level
+    """
+
+    __slots__ = ('stat', 'flat', 'percent', 'per_level')
+
+    def __init__(self, stat, flat=0, percent=0, per_level=False):
+        self.stat = stat
+        self.flat = flat
+        self.percent = percent
+        self.per_level = per_level
+
+
+class Modifiers(object):
+    """Combined stat modifiers of several entities.
+
+    Flat values and percentages of each stat are summed separately,
+    and applied flat first: (value + flat) * (100 + percent) / 100.
+    """
+
+    __slots__ = ('_stats', )
+
+    def __init__(self, stats=None):
+        """Initializes combined modifiers.
+
+        Args:
+            stats: Dictionary of stat names and (flat, percent) pairs
+        """
+
+        self._stats = stats or {}
+
+    @classmethod
+    def combine(cls, entities):
+        """Combines the modifiers declared by entities.
+
+        Args:
+            entities: Entities whose modifiers to combine
+
+        Returns:
+            New Modifiers
+        """
+
+        stats = {}
+        for entity in entities:
+            for modifier in entity.modifiers:
+                scale = entity.level if modifier.per_level else 1
+                flat, percent = stats.get(modifier.stat, (0, 0))
+                stats[modifier.stat] = (
+                    flat + modifier.flat * scale,
+                    percent + modifier.percent * scale
+                )
+        return cls(stats)
+
+    def get(self, stat):
+        """Gets a stat's combined (flat, percent) pair."""
+
+        return self._stats.get(stat, (0, 0))
+
+    def apply(self, stat, value):
+        """Applies a stat's modifiers to a value.
+
+        Args:
+            stat: Name of the stat
+            value: Base value of the stat
+
+        Returns:
+            Modified value
+        """
+
+        flat, percent = self._stats.get(stat, (0, 0))
+        if not flat and not percent:
+            return value
+        return (value + flat) * (100 + percent) / 100
\ No newline at end of file
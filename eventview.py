@@ -0,0 +1,148 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.player import get_player
+
+from herowars.effects import EffectBatch
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'EventView',
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class EventView(object):
+    """Game event decoded once and passed to every skill.
+
+    The common fields are read from the game event when the view is
+    created, and the players they refer to are resolved right away,
+    so skills read plain attributes instead of calling get_int()
+    over and over again. Rare fields are still available through
+    the get_*() methods, which fall back to the raw game event.
+
+    In player_hurt and player_death the victim is in defender and
+    userid is 0, as skills have always expected.
+
+    Attributes:
+        game_event: The raw game event
+        userid, attacker, defender, assister: Userids of the players
+        damage: Damage dealt to the victim's health
+        weapon: Name of the weapon used
+        headshot: Was the hit a headshot
+        player: Player of userid
+        attacker_player: Player of attacker
+        defender_player: Player of defender
+        assister_player: Player of assister
+        effects: EffectBatch resolved after the skills have run
+    """
+
+    __slots__ = (
+        'game_event', 'userid', 'attacker', 'defender', 'assister',
+        'damage', 'weapon', 'headshot', 'player', 'attacker_player',
+        'defender_player', 'assister_player', 'effects'
+    )
+
+    # Decoded fields, and raw names of the renamed ones
+    _fields = (
+        'userid', 'attacker', 'defender', 'assister', 'damage', 'weapon',
+        'headshot'
+    )
+    _aliases = {'dmg_health': 'damage'}
+
+    def __init__(self, game_event, userid=0, attacker=0, defender=0,
+                 assister=0, damage=0, weapon='', headshot=False):
+        """Initializes a new view, resolving the players.
+
+        Args:
+            game_event: The raw game event
+            userid, attacker, defender, assister: Userids of the players
+            damage: Damage dealt to the victim's health
+            weapon: Name of the weapon used
+            headshot: Was the hit a headshot
+        """
+
+        self.game_event = game_event
+        self.userid = userid
+        self.attacker = attacker
+        self.defender = defender
+        self.assister = assister
+        self.damage = damage
+        self.weapon = weapon
+        self.headshot = headshot
+        self.player = get_player(userid) if userid else None
+        self.attacker_player = get_player(attacker) if attacker else None
+        self.defender_player = get_player(defender) if defender else None
+        self.assister_player = get_player(assister) if assister else None
+        self.effects = EffectBatch()
+
+    @classmethod
+    def from_player_event(cls, game_event):
+        """Decodes an event of a single player, like player_jump.
+
+        Args:
+            game_event: The raw game event
+
+        Returns:
+            New view
+        """
+
+        return cls(game_event, userid=game_event.get_int('userid'))
+
+    @classmethod
+    def from_combat_event(cls, game_event):
+        """Decodes player_hurt or player_death.
+
+        Args:
+            game_event: The raw game event
+
+        Returns:
+            New view
+        """
+
+        return cls(
+            game_event,
+            attacker=game_event.get_int('attacker'),
+            defender=game_event.get_int('userid'),
+            assister=game_event.get_int('assister'),
+            damage=game_event.get_int('dmg_health'),
+            weapon=game_event.get_string('weapon'),
+            headshot=game_event.get_bool('headshot')
+        )
+
+    def _get(self, name, getter):
+        """Gets a decoded field or reads it from the raw game event."""
+
+        name = self._aliases.get(name, name)
+        if name in self._fields:
+            return getattr(self, name)
+        return getter(name)
+
+    def get_int(self, name):
+        """Gets an integer field."""
+
+        return self._get(name, self.game_event.get_int)
+
+    def get_string(self, name):
+        """Gets a string field."""
+
+        return self._get(name, self.game_event.get_string)
+
+    def get_bool(self, name):
+        """Gets a boolean field."""
+
+        return self._get(name, self.game_event.get_bool)
+
+    def get_float(self, name):
+        """Gets a float field."""
+
+        return self._get(name, self.game_event.get_float)
\ No newline at end of file
@@ -0,0 +1,147 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.database import save_gold_entries
+from herowars.database import compact_gold
+
+from herowars.workers import worker_pool
+from herowars.workers import QueueFullError
+
+from herowars.configs import database_path
+from herowars.configs import gold_flush_interval
+from herowars.configs import gold_compact_interval
+
+# Python
+import sqlite3
+import time
+
+# Source.Python
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'GoldLedger',
+    'gold_ledger'
+)
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def _report_compaction(error):
+    """Reports a failed compaction."""
+
+    print('[HW] Failed to compact the gold ledger: {0!r}'.format(error))
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class GoldLedger(object):
+    """Records players' gold changes as appended ledger entries.
+
+    Each change of a player's gold is queued as a small entry, and
+    the queued entries are inserted together every flush interval,
+    so a crash loses at most the last interval's changes instead of
+    everything since the player was last saved. The players table's
+    gold is never overwritten by the game; compaction folds the
+    ledger into it on a worker thread, and loading a player adds
+    the uncompacted entries to it, so the total is always exact.
+    """
+
+    def __init__(self, flush_interval=gold_flush_interval,
+                 compact_interval=gold_compact_interval):
+        """Initializes a new ledger.
+
+        Args:
+            flush_interval: Seconds between the inserts
+            compact_interval: Seconds between the compactions
+        """
+
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self._entries = []
+        self._steamids = set()
+        self._next_compaction = 0
+        self._tick_repeat = TickRepeat(self._step)
+
+    def start(self):
+        """Starts the periodic inserts and compactions."""
+
+        self._next_compaction = time.time() + self.compact_interval
+        self._tick_repeat.start(self.flush_interval, 0)
+
+    def stop(self):
+        """Stops the periodic inserts, keeping the queued entries."""
+
+        self._tick_repeat.stop()
+
+    def record(self, steamid, amount, reason=None):
+        """Queues a change of a player's gold.
+
+        Args:
+            steamid: Steamid of the player
+            amount: Amount of gold gained, negative for spent gold
+            reason: Description of the change, e.g. a hero's class id
+        """
+
+        self._entries.append((steamid, amount, reason, int(time.time())))
+        self._steamids.add(steamid)
+
+    def has_pending(self, steamid):
+        """Checks if a player has changes that haven't been inserted.
+
+        Args:
+            steamid: Steamid of the player
+
+        Returns:
+            True if the player has queued entries
+        """
+
+        return steamid in self._steamids
+
+    def flush(self):
+        """Inserts the queued entries.
+
+        The entries are kept if the insert fails, and inserted
+        on the next flush.
+        """
+
+        if not self._entries:
+            return
+        entries, self._entries = self._entries, []
+        try:
+            save_gold_entries(database_path, entries)
+        except sqlite3.Error as error:
+            print('[HW] Failed to save the gold ledger: {0}'.format(error))
+            self._entries[:0] = entries
+            return
+        self._steamids = {entry[0] for entry in self._entries}
+
+    def _step(self):
+        """Flushes the entries and compacts the ledger when it's time."""
+
+        self.flush()
+        if time.time() < self._next_compaction:
+            return
+        self._next_compaction = time.time() + self.compact_interval
+        try:
+            worker_pool.submit(
+                compact_gold, database_path, errback=_report_compaction)
+        except (QueueFullError, RuntimeError):
+            pass  # Compacted next time
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+gold_ledger = GoldLedger()
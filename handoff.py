@@ -0,0 +1,155 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.heroes import get_hero_class
+
+# Python
+import marshal
+import os
+import sys
+import time
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'dump_players',
+    'load_players',
+    'is_fresh',
+    'restore_player'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Bump when the layout of the dumped players changes
+_VERSION = 1
+
+# Layout of a dumped player, checked along with the version
+_SCHEMA = repr((
+    'gold', 'hero_cls_id',
+    ('cls_id', 'level', 'exp', ('cls_id', 'level'))
+))
+
+# Marshal's format depends on the Python version
+_STAMP = (_VERSION, _SCHEMA, marshal.version, tuple(sys.version_info[:2]))
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def _dump_player(player):
+    """Gets a player's data as plain tuples."""
+
+    return (
+        player.gold,
+        player.hero.cls_id,
+        tuple(
+            (hero.cls_id, hero.level, hero.exp,
+             tuple((skill.cls_id, skill.level) for skill in hero.skills))
+            for hero in player.heroes
+        )
+    )
+
+
+def dump_players(players, path):
+    """Writes the players' data into a snapshot file.
+
+    Should be called after the players have been saved into the
+    database, the snapshot only spares the next load from reading
+    the database again.
+
+    Args:
+        players: Players whose data to dump
+        path: Path to the snapshot file, preferably on tmpfs
+    """
+
+    data = {player.steamid: _dump_player(player) for player in players}
+    partial = path + '.part'
+    with open(partial, 'wb') as snapshot_file:
+        marshal.dump((_STAMP, time.time(), data), snapshot_file)
+    os.replace(partial, path)
+
+
+def load_players(path, database_file, max_age):
+    """Reads and removes a snapshot file.
+
+    The snapshot is ignored if it was written by another version,
+    if it's older than max_age or if the database has been modified
+    after the snapshot was made.
+
+    Args:
+        path: Path to the snapshot file
+        database_file: Path to the database file
+        max_age: Seconds a snapshot stays usable
+
+    Returns:
+        Tuple of the snapshot's creation time and a dictionary of
+        steamids and player data, (None, {}) if there's no usable
+        snapshot
+    """
+
+    try:
+        with open(path, 'rb') as snapshot_file:
+            stamp, created, data = marshal.load(snapshot_file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None, {}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    if stamp != _STAMP or not is_fresh(created, database_file, max_age):
+        return None, {}
+    return created, data
+
+
+def is_fresh(created, database_file, max_age):
+    """Checks if a snapshot's data can still be used.
+
+    Args:
+        created: Creation time of the snapshot
+        database_file: Path to the database file
+        max_age: Seconds a snapshot stays usable
+
+    Returns:
+        False if the snapshot is older than max_age or the database
+        has been modified after the snapshot was made
+    """
+
+    if time.time() - created > max_age:
+        return False
+    try:
+        return os.path.getmtime(database_file) <= created
+    except OSError:
+        return False
+
+
+def restore_player(player, data):
+    """Restores a player's data from a snapshot.
+
+    Heroes whose classes no longer exist are skipped.
+
+    Args:
+        player: Player whose data to restore
+        data: Player's data from load_players()
+    """
+
+    gold, hero_cls_id, heroes = data
+    player._gold = gold  # Not a change, mustn't enter the ledger
+    for cls_id, level, exp, skills in heroes:
+        hero_cls = get_hero_class(cls_id)
+        if not hero_cls or not hero_cls.enabled:
+            continue
+        hero = hero_cls(level, exp)
+        skill_levels = dict(skills)
+        for skill in hero.skills:
+            skill.level = skill_levels.get(skill.cls_id, skill.level)
+        player.heroes.append(hero)
+        if cls_id == hero_cls_id:
+            player._hero = hero
\ No newline at end of file
@@ -2,14 +2,435 @@
 # >> IMPORTS
 # ======================================================================
 
-import os
+# Hero Wars
+from herowars.entities import Hero
+
+# Python
+import ast
 import glob
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
 
 
 # ======================================================================
 # >> ALL DECLARATION
 # ======================================================================
 
-_modules = glob.glob(os.path.join(os.path.dirname(__file__), '*.py'))
-__all__ = tuple(os.path.basename(f)[:-3]
-    for f in _modules if not f.endswith('__init__.py'))
\ No newline at end of file
+__all__ = (
+    'HeroInfo',
+    'get_hero_infos',
+    'get_hero_info',
+    'get_hero_class',
+    'get_known_cls_ids',
+    'refresh',
+    'reload_module'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+_directory = os.path.dirname(__file__)
+
+# Class attributes read from the hero modules, with their defaults
+_fields = (
+    ('name', Hero.name),
+    ('description', Hero.description),
+    ('author', Hero.author),
+    ('cost', Hero.cost),
+    ('required_level', Hero.required_level),
+    ('max_level', Hero.max_level),
+    ('enabled', Hero.enabled),
+    ('allowed_users', Hero.allowed_users)
+)
+
+_infos = None  # cls_id: HeroInfo, filled from the manifest
+_classes = {}  # cls_id: Imported hero class
+_failed_modules = set()  # Names of hero modules that failed to import
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class HeroInfo(object):
+    """Metadata of a hero, available without importing its module.
+
+    Attributes:
+        cls_id: Class id of the hero
+        module: Name of the module the hero is defined in
+        name, description, author, cost, required_level, max_level,
+        enabled, allowed_users: The hero class' attributes
+    """
+
+    __slots__ = ('cls_id', 'module') + tuple(field for field, _ in _fields)
+
+    def __init__(self, cls_id, module, **attributes):
+        """Initializes hero metadata.
+
+        Args:
+            cls_id: Class id of the hero
+            module: Name of the hero's module
+            **attributes: Class attributes, defaults used for missing
+        """
+
+        self.cls_id = cls_id
+        self.module = module
+        for field, default in _fields:
+            setattr(self, field, attributes.get(field, default))
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def _parse_module(path):
+    """Reads hero metadata from a module's source without importing it.
+
+    Heroes are the classes inheriting Hero or another hero of the same
+    module. Class attributes with literal values are recorded, others
+    fall back to Hero's defaults.
+
+    Args:
+        path: Path to the module
+
+    Returns:
+        Tuple of list of hero attribute dictionaries and list of
+        the names of all the classes in the module
+    """
+
+    with open(path, encoding='utf-8') as source:
+        tree = ast.parse(source.read(), path)
+    heroes = []
+    hero_names = {'Hero'}
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        classes.append(node.name)
+        bases = [
+            base.id if isinstance(base, ast.Name) else getattr(base, 'attr', '')
+            for base in node.bases
+        ]
+        if not hero_names.intersection(bases):
+            continue
+        hero_names.add(node.name)
+        attributes = {'cls_id': node.name}
+        for statement in node.body:
+            if isinstance(statement, ast.Assign) \
+                    and len(statement.targets) == 1 \
+                    and isinstance(statement.targets[0], ast.Name):
+                try:
+                    value = ast.literal_eval(statement.value)
+                except (ValueError, TypeError, SyntaxError):
+                    continue
+                attributes[statement.targets[0].id] = value
+        heroes.append(attributes)
+    return heroes, classes
+
+
+def _load_manifest(directory=_directory):
+    """Loads the manifest, re-parsing modules that have changed.
+
+    The manifest is stored next to the hero modules and keyed by
+    each module's modification time and size, so only new and edited
+    modules get parsed.
+
+    Args:
+        directory: Directory of the hero modules
+
+    Returns:
+        Dictionary of module names and their manifest entries
+    """
+
+    manifest_path = os.path.join(directory, 'manifest.json')
+    try:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        manifest = {}
+    changed = False
+    modules = set()
+    for path in glob.glob(os.path.join(directory, '*.py')):
+        module = os.path.basename(path)[:-3]
+        if module == '__init__':
+            continue
+        modules.add(module)
+        stat = os.stat(path)
+        entry = manifest.get(module)
+        if entry and entry['mtime'] == stat.st_mtime \
+                and entry['size'] == stat.st_size:
+            continue
+        heroes, classes = _parse_module(path)
+        manifest[module] = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'heroes': heroes,
+            'classes': classes
+        }
+        changed = True
+    for module in set(manifest) - modules:
+        del manifest[module]
+        changed = True
+    if changed:
+        try:
+            with open(manifest_path, 'w') as manifest_file:
+                json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+        except OSError:
+            pass  # Read-only installs simply re-parse on every load
+    return manifest
+
+
+def _get_infos():
+    """Gets the hero metadata, loading the manifest on first use."""
+
+    global _infos
+    if _infos is None:
+        _infos = {}
+        for module, entry in _load_manifest().items():
+            for attributes in entry['heroes']:
+                info = HeroInfo(module=module, **attributes)
+                _infos[info.cls_id] = info
+    return _infos
+
+
+def refresh():
+    """Forgets the loaded manifest so it gets reloaded on next use."""
+
+    global _infos
+    _infos = None
+
+
+def get_hero_infos():
+    """Gets the metadata of the enabled heroes.
+
+    Returns:
+        List of HeroInfo objects, sorted by the heroes' names
+    """
+
+    return sorted(
+        (info for info in _get_infos().values() if info.enabled),
+        key=lambda info: info.name
+    )
+
+
+def get_hero_info(cls_id):
+    """Gets a hero's metadata.
+
+    Args:
+        cls_id: Class id of the hero
+
+    Returns:
+        The hero's HeroInfo or None if there's no such hero
+    """
+
+    return _get_infos().get(cls_id)
+
+
+def get_hero_class(cls_id):
+    """Gets a hero class, importing its module if needed.
+
+    A module that fails to import is logged once and its heroes are
+    treated as missing until it's reloaded, so a broken hero can't
+    stop players from being loaded.
+
+    Args:
+        cls_id: Class id of the hero
+
+    Returns:
+        The hero class or None if there's no such hero
+    """
+
+    if cls_id in _classes:
+        return _classes[cls_id]
+    info = get_hero_info(cls_id)
+    if info is None or info.module in _failed_modules:
+        return None
+    try:
+        module = importlib.import_module(
+            '{0}.{1}'.format(__name__, info.module))
+    except Exception as error:
+        _failed_modules.add(info.module)
+        print('[HW] Failed to import hero module {0}: {1!r}'.format(
+            info.module, error))
+        return None
+    _classes.update(_get_module_heroes(module))
+    return _classes.get(cls_id)
+
+
+def _get_module_heroes(module):
+    """Gets the hero classes defined in a module.
+
+    Args:
+        module: Imported hero module
+
+    Returns:
+        Dictionary of class ids and hero classes
+    """
+
+    return {
+        obj.cls_id: obj for obj in vars(module).values()
+        if isinstance(obj, type) and issubclass(obj, Hero)
+        and obj.__module__ == module.__name__
+    }
+
+
+def reload_module(module_name, heroes=()):
+    """Re-imports a hero module and migrates live heroes to it.
+
+    The module's new hero classes replace the old ones in the
+    registry, and the given heroes of the old classes are switched to
+    the new classes in place, keeping their level, exp and the levels
+    of the skills that still exist.
+
+    Args:
+        module_name: Name of the module in the heroes package
+        heroes: Live heroes to migrate, others are left untouched
+
+    Returns:
+        List of the class ids of the reloaded heroes
+
+    Raises:
+        ImportError: If the module can't be found or imported
+    """
+
+    name = '{0}.{1}'.format(__name__, module_name)
+    if name in sys.modules:
+        module = importlib.reload(sys.modules[name])
+    else:
+        module = importlib.import_module(name)
+    refresh()
+    _failed_modules.discard(module_name)
+    new_classes = _get_module_heroes(module)
+    for cls_id in [cls_id for cls_id, hero_cls in _classes.items()
+                   if hero_cls.__module__ == name]:
+        del _classes[cls_id]
+    _classes.update(new_classes)
+    for hero in heroes:
+        hero_cls = new_classes.get(hero.cls_id)
+        if hero_cls and type(hero) is not hero_cls \
+                and type(hero).__module__ == name:
+            _migrate_hero(hero, hero_cls)
+    return sorted(new_classes)
+
+
+def _migrate_hero(hero, hero_cls):
+    """Switches a hero to a new version of its class in place.
+
+    Args:
+        hero: Hero to migrate
+        hero_cls: New class of the hero
+    """
+
+    skill_levels = {skill.cls_id: skill.level for skill in hero.skills}
+    hero.__class__ = hero_cls
+    hero.create_skills()
+    for skill in hero.skills:
+        level = skill_levels.get(skill.cls_id, 0)
+        if skill.max_level > 0:
+            level = min(level, skill.max_level)
+        skill.level = level
+
+
+def get_known_cls_ids():
+    """Gets the class ids of every class in the hero modules.
+
+    Includes heroes, skills and disabled classes.
+
+    Returns:
+        Set of class ids
+    """
+
+    cls_ids = set()
+    for entry in _load_manifest().values():
+        cls_ids.update(entry['classes'])
+    return cls_ids
+
+
+def _benchmark(module_count=300, skill_count=6):
+    """Compares importing every hero module against the manifest.
+
+    Generates hero modules into a temporary package and times the old
+    eager startup, importing all of them, against the lazy one, loading
+    the manifest and importing the one hero a player picked. The lazy
+    startup is timed both with a fresh manifest, like after an update,
+    and with an up to date one. Bytecode is compiled beforehand.
+
+    Run with:
+        python -c "from herowars.heroes import _benchmark; _benchmark()"
+    """
+
+    root = tempfile.mkdtemp()
+    package = '_hw_benchmark_heroes'
+    directory = os.path.join(root, package)
+    os.mkdir(directory)
+    open(os.path.join(directory, '__init__.py'), 'w').close()
+    for i in range(module_count):
+        lines = ['from herowars.entities import Hero, Skill', '']
+        for j in range(skill_count):
+            lines += [
+                '',
+                'class Skill{0}_{1}(Skill):'.format(i, j),
+                '    name = \'Skill {0}\''.format(j),
+                '    max_level = 8',
+                '',
+                '    def on_attack(self, event):',
+                '        event.effects.damage(',
+                '            event.defender_player, self.level)',
+                ''
+            ]
+        lines += [
+            '',
+            'class Hero{0}(Hero):'.format(i),
+            '    name = \'Hero {0}\''.format(i),
+            '    description = \'Benchmark hero\'',
+            '    cost = {0}'.format(i % 10),
+            '    skill_set = ({0},)'.format(', '.join(
+                'Skill{0}_{1}'.format(i, j) for j in range(skill_count)))
+        ]
+        path = os.path.join(directory, 'hero{0}.py'.format(i))
+        with open(path, 'w') as module_file:
+            module_file.write('\n'.join(lines) + '\n')
+    manifest_path = os.path.join(directory, 'manifest.json')
+
+    def forget():
+        for name in list(sys.modules):
+            if name == package or name.startswith(package + '.'):
+                del sys.modules[name]
+
+    def forget_manifest():
+        forget()
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+    def eager():
+        for i in range(module_count):
+            importlib.import_module('{0}.hero{1}'.format(package, i))
+
+    def lazy():
+        _load_manifest(directory)
+        importlib.import_module(package + '.hero0')
+
+    sys.path.insert(0, root)
+    try:
+        importlib.invalidate_caches()
+        eager()  # Compile the bytecode
+        forget()
+        for name, function, setup in (
+                ('eager', eager, forget),
+                ('lazy, new manifest', lazy, forget_manifest),
+                ('lazy', lazy, forget)):
+            seconds = min(timeit.repeat(
+                function, setup, number=1, repeat=5))
+            print('{0:>18}: {1:.1f} ms ({2} modules, {3} skills each)'
+                  .format(name, seconds * 1000, module_count, skill_count))
+    finally:
+        sys.path.remove(root)
+        forget()
+        shutil.rmtree(root)
\ No newline at end of file
@@ -0,0 +1,119 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.database import save_hero_stats
+
+from herowars.configs import database_path
+from herowars.configs import hero_stats_interval
+
+# Python
+import sqlite3
+
+# Source.Python
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'KILLS',
+    'DEATHS',
+    'ASSISTS',
+    'HEADSHOTS',
+    'DAMAGE',
+    'HeroStats',
+    'hero_stats'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Indexes of the counters, in the order of the hero_stats columns
+KILLS, DEATHS, ASSISTS, HEADSHOTS, DAMAGE = range(5)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class HeroStats(object):
+    """Combat statistics counted in memory and flushed periodically.
+
+    Event handlers increment the counters of a player's current hero:
+
+        hero_stats.counters(attacker)[KILLS] += 1
+
+    Every interval the counters are added onto the hero_stats table
+    in a single transaction and reset, so the statistics cost one
+    write per interval instead of one per event.
+    """
+
+    def __init__(self, interval=hero_stats_interval):
+        """Initializes new statistics.
+
+        Args:
+            interval: Seconds between the flushes
+        """
+
+        self.interval = interval
+        self._counters = {}  # (steamid, cls_id): [kills, deaths, ...]
+        self._tick_repeat = TickRepeat(self.flush)
+
+    def start(self):
+        """Starts the periodic flushes."""
+
+        self._tick_repeat.start(self.interval, 0)
+
+    def stop(self):
+        """Stops the periodic flushes, keeping the counters."""
+
+        self._tick_repeat.stop()
+
+    def counters(self, player):
+        """Gets the counters of a player's current hero.
+
+        Args:
+            player: Player whose counters to get
+
+        Returns:
+            List of the counters, indexed with KILLS, DEATHS, etc.
+        """
+
+        key = (player.steamid, player.hero.cls_id)
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters[key] = [0, 0, 0, 0, 0]
+        return counters
+
+    def flush(self):
+        """Adds the counters onto the database and resets them.
+
+        The counters are kept if the write fails, and added to
+        on the next flush.
+        """
+
+        if not self._counters:
+            return
+        counters, self._counters = self._counters, {}
+        rows = [key + tuple(values) for key, values in counters.items()]
+        try:
+            save_hero_stats(database_path, rows)
+        except sqlite3.Error as error:
+            print('[HW] Failed to save hero statistics: {0}'.format(error))
+            for key, values in counters.items():
+                current = self._counters.setdefault(key, [0, 0, 0, 0, 0])
+                for i, value in enumerate(values):
+                    current[i] += value
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+hero_stats = HeroStats()
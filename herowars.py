@@ -6,20 +6,70 @@
 from herowars.player import get_player
 from herowars.player import create_player
 from herowars.player import remove_player
+from herowars.player import players
+from herowars.player import refresh_invalidated_players
+from herowars.player import set_handoff
+from herowars.player import get_cache_stats
 
 from herowars.database import setup_database
-from herowars.database import save_player_data
+from herowars.database import load_player_stats
 
-from herowars.heroes import *
+from herowars.leaderboard import leaderboard
 
-from herowars.entities import Hero
+from herowars.backup import start_backup
+from herowars.backup import get_backup
+
+from herowars.maintenance import PruneJob
+
+from herowars.autosave import autosave
+
+from herowars.profiler import SamplingProfiler
+
+from herowars.eventview import EventView
+
+from herowars.workers import worker_pool
+
+from herowars.status import status_engine
+
+from herowars.goldledger import gold_ledger
+
+from herowars.herostats import hero_stats
+from herowars.herostats import KILLS
+from herowars.herostats import DEATHS
+from herowars.herostats import ASSISTS
+from herowars.herostats import HEADSHOTS
+from herowars.herostats import DAMAGE
+
+from herowars.handoff import dump_players
+from herowars.handoff import load_players
+
+from herowars.heroes import get_hero_infos
+from herowars.heroes import reload_module
 
 from herowars.configs import database_path
+from herowars.configs import inactive_days
+from herowars.configs import handoff_path
+from herowars.configs import handoff_max_age
 
 import herowars.menus as menus
 
+# Python
+import threading
+import time
+
 # Source.Python 
 from events import Event
+from commands.server import ServerCommand
+from listeners import LevelShutdown
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Picks up players changed by other servers using the storage service
+_invalidation_repeat = TickRepeat(refresh_invalidated_players)
 
 
 # ======================================================================
@@ -29,93 +79,360 @@ from events import Event
 def load():
     """Setups the database upon Hero Wars loading.
 
-    Also makes sure there are heroes on the server.
+    Also makes sure there are heroes on the server, fills
+    the leaderboard from the maintained player stats, picks up
+    the players handed over by the previous unload and starts
+    the autosave, the gold ledger, the status effects and the hero
+    statistics.
     
     Raises:
         NotImplementedError: When there are no heroes
     """
 
-    if not Hero.get_subclasses():
+    if not get_hero_infos():
         raise NotImplementedError('No heroes on the server.')
     setup_database(database_path)
+    leaderboard.clear()
+    leaderboard.populate(load_player_stats(database_path))
+    set_handoff(*load_players(handoff_path, database_path, handoff_max_age))
+    autosave.start()
+    gold_ledger.start()
+    worker_pool.start()
+    status_engine.start()
+    hero_stats.start()
+    _invalidation_repeat.start(0.5, 0)
+
+
+def unload():
+    """Stops the autosaves and saves every player with unsaved data.
+
+    The queued gold changes and the hero statistics counted since
+    the last flush are saved too.
+
+    The online players are also dumped into a snapshot, which lets
+    the next load restore them without reading the database.
+    """
+
+    _invalidation_repeat.stop()
+    status_engine.stop()
+    worker_pool.stop()
+    autosave.stop()
+    autosave.flush()
+    gold_ledger.stop()
+    gold_ledger.flush()
+    hero_stats.stop()
+    hero_stats.flush()
+    try:
+        dump_players(players, handoff_path)
+    except OSError as error:
+        print('[HW] Failed to write the handoff snapshot: {0}'.format(error))
+
+
+def _apply_spawn_modifiers(player):
+    """Applies hero's health and armor modifiers on spawn."""
+
+    modifiers = player.hero.modifiers
+    health = int(modifiers.apply('health', player.health))
+    armor = int(modifiers.apply('armor', player.armor))
+    if health != player.health:
+        player.health = health
+    if armor != player.armor:
+        player.armor = armor
+
+
+def _apply_damage_modifiers(event, attacker, defender):
+    """Adds the damage modifiers of both heroes to a hit's effects.
+
+    The attacker's 'damage' and the defender's 'damage_taken'
+    modifiers are applied to the dealt damage, and the difference
+    is added to the event's effects as flat damage.
+    """
+
+    damage = defender.hero.modifiers.apply(
+        'damage_taken', attacker.hero.modifiers.apply('damage', event.damage))
+    if damage != event.damage:
+        event.effects.damage(defender, damage - event.damage, attacker)
 
 
 # ======================================================================
 # >> GAME EVENTS
 # ======================================================================
 
+@LevelShutdown
+def level_shutdown():
+    """Saves the hero statistics at the end of the map.
+
+    Also forgets the unused handed over player data, every player
+    joining the next map is loaded from the database.
+    """
+
+    hero_stats.flush()
+    set_handoff(None, {})
+
+
 @Event
 def player_disconnect(game_event):
-    """Removes a player and saves his data upon disconnection."""
+    """Removes a player and saves his data upon disconnection.
+
+    Also cancels the player's unfinished worker tasks and removes
+    his status effects.
+    """
 
     userid = game_event.get_int('userid')
+    player = get_player(userid)
+    if player:
+        worker_pool.cancel_owner(player)
+        status_engine.clear(player, end=False)
+        menus.forget_player(player)
     remove_player(userid)
 
 
 @Event
 def player_spawn(game_event):
-    """Creates new players and saves existing players' data.
+    """Creates new players and executes spawn skills.
 
-    Also executes spawn skills.
+    Existing players' data is saved by the autosave instead.
     """
 
     userid = game_event.get_int('userid')
     player = get_player(userid)
-    if player:
-        save_player_data(database_path, player)
-    else:
+    if not player:
         player = create_player(userid)
     if game_event.get_int('teamnum') > 0:
-        player.hero.execute_skills('on_spawn', game_event)
+        _apply_spawn_modifiers(player)
+        event = EventView.from_player_event(game_event)
+        player.hero.execute_skills('on_spawn', event)
+        event.effects.resolve()
 
 
 @Event
 def player_death(game_event):
-    """Executes kill, assist and death skills."""
+    """Executes kill, assist and death skills and counts the kill.
+
+    The victim's status effects end after the skills have run.
+    """
 
-    game_event.set_int('defender', game_event.get_int('userid'))
-    game_event.set_int('userid', 0)
-    defender = get_player(game_event.get_int('defender'))
-    attacker = get_player(game_event.get_int('attacker'))
-    assister = get_player(game_event.get_int('assister'))
+    event = EventView.from_combat_event(game_event)
+    defender = event.defender_player
+    attacker = event.attacker_player
+    assister = event.assister_player
     if defender:
         if attacker:
-            attacker.hero.execute_skills('on_kill', game_event)
-            defender.hero.execute_skills('on_death', game_event)
+            attacker.hero.execute_skills('on_kill', event)
+            defender.hero.execute_skills('on_death', event)
+            counters = hero_stats.counters(attacker)
+            counters[KILLS] += 1
+            if event.headshot:
+                counters[HEADSHOTS] += 1
         else:
-            defender.hero.execute_skills('on_suicide', game_event)
+            defender.hero.execute_skills('on_suicide', event)
+        hero_stats.counters(defender)[DEATHS] += 1
         if assister:
-            assister.hero.execute_skills('on_assist', game_event)
+            assister.hero.execute_skills('on_assist', event)
+            hero_stats.counters(assister)[ASSISTS] += 1
+        event.effects.resolve()
+        status_engine.clear(defender)
 
 
 @Event
 def player_hurt(game_event):
-    """Executes attack and defend skills."""
+    """Executes attack and defend skills and counts the damage."""
 
-    game_event.set_int('defender', game_event.get_int('userid'))
-    game_event.set_int('userid', 0)
-    defender = get_player(game_event.get_int('defender'))
-    attacker = get_player(game_event.get_int('attacker'))
+    event = EventView.from_combat_event(game_event)
+    defender = event.defender_player
+    attacker = event.attacker_player
     if defender and attacker:
-        attacker.hero.execute_skills('on_attack', game_event)
-        defender.hero.execute_skills('on_defend', game_event)
+        attacker.hero.execute_skills('on_attack', event)
+        defender.hero.execute_skills('on_defend', event)
+        _apply_damage_modifiers(event, attacker, defender)
+        event.effects.resolve()
+        hero_stats.counters(attacker)[DAMAGE] += event.damage
 
 
 @Event
 def player_jump(game_event):
     """Executes jump skills."""
 
-    player = get_player(game_event.get_int('userid'))
-    if player:
-        player.hero.execute_skills('on_jump', game_event)
+    event = EventView.from_player_event(game_event)
+    if event.player:
+        event.player.hero.execute_skills('on_jump', event)
+        event.effects.resolve()
 
 
 @Event
 def player_say(game_event):
-    """Executes ultimate skills."""
+    """Executes ultimate skills and opens the hero menus."""
+
+    text = game_event.get_string('text')
+    if text == '!ultimate':
+        event = EventView.from_player_event(game_event)
+        if event.player:
+            event.player.hero.execute_skills('on_ultimate', event)
+            event.effects.resolve()
+    elif text in ('!shop', '!heroes'):
+        player = get_player(game_event.get_int('userid'))
+        if player:
+            if text == '!shop':
+                menus.send_shop_menu(player)
+            else:
+                menus.send_hero_menu(player)
 
-    player = get_player(game_event.get_int('userid'))
-    if player:
-        text = game_event.get_string('text')
-        if text == '!ultimate':
-            player.hero.execute_skills('on_ultimate', game_event)
\ No newline at end of file
+
+# ======================================================================
+# >> SERVER COMMANDS
+# ======================================================================
+
+def _report_backup():
+    """Prints the progress of the latest backup."""
+
+    backup = get_backup()
+    if not backup:
+        print('[HW] No backups made.')
+    elif backup.error:
+        print('[HW] Backup to {0} failed: {1}'.format(
+            backup.target, backup.error))
+    elif backup.running:
+        print('[HW] Backup to {0}: {1:.0%}, restarted {2} times'.format(
+            backup.target, backup.progress, backup.restarts))
+    else:
+        print('[HW] Backup to {0} done in {1:.1f}s.'.format(
+            backup.target, backup.finished - backup.started))
+    if not backup or not backup.running:
+        _backup_report.stop()
+
+_backup_report = TickRepeat(_report_backup)
+
+
+@ServerCommand('hw_backup')
+def hw_backup(command):
+    """Starts an online backup of the database.
+
+    Usage: hw_backup [path], defaults to a timestamped snapshot.
+    Progress is reported every second until the backup is done.
+    """
+
+    target = command.get_arg(1) if command.get_arg_count() > 1 else None
+    try:
+        backup = start_backup(database_path, target)
+    except RuntimeError as error:
+        print('[HW] {0}'.format(error))
+        return
+    print('[HW] Backing up the database to {0}.'.format(backup.target))
+    _backup_report.stop()
+    _backup_report.start(1, 0)
+
+
+@ServerCommand('hw_backup_status')
+def hw_backup_status(command):
+    """Prints the progress of the latest backup."""
+
+    _report_backup()
+
+
+def _report_prune(job):
+    """Prints the results of a finished pruning job."""
+
+    print('[HW] Pruning done, deleted rows: {0}'.format(', '.join(
+        '{0}={1}'.format(table, count) for table, count in job.deleted.items()
+    ) or 'none'))
+
+
+@ServerCommand('hw_prune')
+def hw_prune(command):
+    """Prunes orphaned heroes and skills and inactive players.
+
+    Usage: hw_prune [days], players unseen for longer get removed.
+    """
+
+    days = inactive_days
+    if command.get_arg_count() > 1:
+        try:
+            days = int(command.get_arg(1))
+        except ValueError:
+            days = -1
+        if days < 0:
+            print('[HW] Usage: hw_prune [days]')
+            return
+    job = PruneJob(database_path, days * 86400,
+                   online_steamids=[player.steamid for player in players],
+                   callback=_report_prune)
+    print('[HW] Pruning players unseen for {0} days.'.format(days))
+    job.start()
+
+
+_profiler = None
+
+
+def _report_profile():
+    """Prints where the finished profile was written."""
+
+    if _profiler.done:
+        _profile_report.stop()
+        if _profiler.error:
+            print('[HW] Profile failed: {0}'.format(_profiler.error))
+            return
+        print('[HW] Profile done, {0} samples.'.format(
+            sum(_profiler.samples.values())))
+
+_profile_report = TickRepeat(_report_profile)
+
+
+@ServerCommand('hw_profile')
+def hw_profile(command):
+    """Samples the game thread for a while.
+
+    Usage: hw_profile <seconds> [path], writes collapsed stacks for
+    flame graphs. Costs nothing while no profile is being taken.
+    """
+
+    global _profiler
+    if _profiler and _profiler.running:
+        print('[HW] A profile is already being taken.')
+        return
+    seconds = 10
+    if command.get_arg_count() > 1:
+        try:
+            seconds = float(command.get_arg(1))
+        except ValueError:
+            seconds = 0
+        if seconds <= 0:
+            print('[HW] Usage: hw_profile <seconds> [path]')
+            return
+    path = command.get_arg(2) if command.get_arg_count() > 2 else \
+        time.strftime('herowars-%Y%m%d-%H%M%S.collapsed')
+    _profiler = SamplingProfiler(threading.get_ident())
+    _profiler.start(seconds, path)
+    print('[HW] Profiling for {0}s into {1}.'.format(seconds, path))
+    _profile_report.stop()
+    _profile_report.start(1, 0)
+
+
+@ServerCommand('hw_reload_hero')
+def hw_reload_hero(command):
+    """Reloads a single hero module without reloading Hero Wars.
+
+    Usage: hw_reload_hero <module>, online players' heroes of the
+    module keep their levels, exp and skill levels.
+    """
+
+    if command.get_arg_count() < 2:
+        print('[HW] Usage: hw_reload_hero <module>')
+        return
+    module_name = command.get_arg(1)
+    heroes = [hero for player in players for hero in player.heroes]
+    try:
+        cls_ids = reload_module(module_name, heroes)
+    except Exception as error:
+        print('[HW] Failed to reload {0}: {1!r}'.format(module_name, error))
+        return
+    menus.refresh()
+    print('[HW] Reloaded {0}: {1}'.format(module_name, ', '.join(cls_ids)))
+
+
+@ServerCommand('hw_cache_stats')
+def hw_cache_stats(command):
+    """Prints the hit rates of the players' per-tick property cache."""
+
+    for name, (hits, misses, rate) in sorted(get_cache_stats().items()):
+        print('[HW] {0}: {1} hits, {2} misses, {3:.0%} hit rate'.format(
+            name, hits, misses, rate))
\ No newline at end of file
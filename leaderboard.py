@@ -0,0 +1,212 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python
+from collections import defaultdict
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'Leaderboard',
+    'leaderboard'
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class _FenwickTree(object):
+    """Binary indexed tree counting players per total level.
+
+    Each slot holds the amount of players having a certain total level,
+    which allows both prefix counts and k-th element lookups
+    in logarithmic time.
+    """
+
+    def __init__(self, size=1024):
+        """Initializes an empty tree.
+
+        Args:
+            size: Initial amount of slots, grows when needed
+        """
+
+        self._size = size
+        self._tree = [0] * (size + 1)
+
+    def _grow(self, value):
+        """Grows the tree so that it can hold the given value."""
+
+        size = self._size
+        while size <= value:
+            size *= 2
+        counts = [self.count_at(i) for i in range(self._size)]
+        self._size = size
+        self._tree = [0] * (size + 1)
+        for value, count in enumerate(counts):
+            if count:
+                self.add(value, count)
+
+    def add(self, value, count):
+        """Adds count to the slot of the given value."""
+
+        if value >= self._size:
+            self._grow(value)
+        i = value + 1
+        while i <= self._size:
+            self._tree[i] += count
+            i += i & -i
+
+    def prefix(self, value):
+        """Gets the amount of players with a total level <= value."""
+
+        i = min(value + 1, self._size)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def count_at(self, value):
+        """Gets the amount of players with exactly the given value."""
+
+        return self.prefix(value) - (self.prefix(value - 1) if value else 0)
+
+    def find(self, k):
+        """Finds the smallest value whose prefix count reaches k."""
+
+        i = 0
+        step = 1
+        while step * 2 <= self._size:
+            step *= 2
+        while step:
+            if i + step <= self._size and self._tree[i + step] < k:
+                i += step
+                k -= self._tree[i]
+            step //= 2
+        return i  # Slot i + 1 holds value i
+
+
+class Leaderboard(object):
+    """Ranking of players by the total level of their heroes.
+
+    Keeps each player's total level in memory along with an order
+    statistic tree, so both top-N and rank queries run in logarithmic
+    time without touching the heroes table.
+    """
+
+    def __init__(self):
+        """Initializes an empty leaderboard."""
+
+        self._totals = {}
+        self._steamids = defaultdict(set)
+        self._tree = _FenwickTree()
+
+    def __len__(self):
+        return len(self._totals)
+
+    def __contains__(self, steamid):
+        return steamid in self._totals
+
+    def clear(self):
+        """Removes every player from the leaderboard."""
+
+        self.__init__()
+
+    def populate(self, rows):
+        """Fills the leaderboard from (steamid, total_level) rows.
+
+        Args:
+            rows: Iterable of steamid and total level pairs
+        """
+
+        for steamid, total_level in rows:
+            self.update(steamid, total_level)
+
+    def update(self, steamid, total_level):
+        """Sets a player's total level.
+
+        Args:
+            steamid: Steamid of the player
+            total_level: Sum of the levels of the player's heroes
+        """
+
+        previous = self._totals.get(steamid)
+        if previous == total_level:
+            return
+        if previous is not None:
+            self._remove_from_slot(steamid, previous)
+        self._totals[steamid] = total_level
+        self._steamids[total_level].add(steamid)
+        self._tree.add(total_level, 1)
+
+    def remove(self, steamid):
+        """Removes a player from the leaderboard.
+
+        Args:
+            steamid: Steamid of the player to remove
+        """
+
+        previous = self._totals.pop(steamid, None)
+        if previous is not None:
+            self._remove_from_slot(steamid, previous)
+
+    def _remove_from_slot(self, steamid, total_level):
+        """Removes a steamid from the given total level's slot."""
+
+        steamids = self._steamids[total_level]
+        steamids.discard(steamid)
+        if not steamids:
+            del self._steamids[total_level]
+        self._tree.add(total_level, -1)
+
+    def total_level(self, steamid):
+        """Gets a player's total level, None if not ranked."""
+
+        return self._totals.get(steamid)
+
+    def rank(self, steamid):
+        """Gets the rank of a player.
+
+        Players with equal total levels share the same rank.
+
+        Args:
+            steamid: Steamid of the player
+
+        Returns:
+            1-based rank of the player or None if the player isn't ranked
+        """
+
+        total_level = self._totals.get(steamid)
+        if total_level is None:
+            return None
+        return len(self._totals) - self._tree.prefix(total_level) + 1
+
+    def top(self, amount):
+        """Gets the best players.
+
+        Args:
+            amount: Maximum amount of players to get
+
+        Returns:
+            List of (steamid, total_level) tuples, best first
+        """
+
+        result = []
+        count = len(self._totals)
+        while len(result) < amount and len(result) < count:
+            total_level = self._tree.find(count - len(result))
+            for steamid in sorted(self._steamids[total_level]):
+                result.append((steamid, total_level))
+        return result[:amount]
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+leaderboard = Leaderboard()
\ No newline at end of file
@@ -0,0 +1,244 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.entities import Hero
+from herowars.entities import Skill
+
+from herowars.heroes import get_known_cls_ids
+
+from herowars.leaderboard import leaderboard
+
+from herowars.tools import get_subclasses
+
+from herowars.configs import prune_batch_size
+from herowars.configs import prune_archive_path
+from herowars.configs import vacuum_pages
+
+# Python
+import sqlite3
+import time
+
+# Source.Python
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'PruneJob',
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class PruneJob(object):
+    """Removes stale data from the database in small steps.
+
+    Finds rows of heroes and skills whose classes no longer exist and
+    every row of players who haven't been seen for a given time.
+    The rows are deleted, optionally archived into another database
+    first, one small batch per tick repeat so the game never waits
+    for the whole job. Once done, the freed pages are released with
+    incremental vacuum steps.
+
+    Attributes:
+        deleted: Dictionary of table names and amounts of deleted rows
+        done: Has the job finished
+    """
+
+    def __init__(self, database_file, max_age, online_steamids=(),
+                 batch_size=prune_batch_size, archive_path=prune_archive_path,
+                 vacuum_pages=vacuum_pages, callback=None):
+        """Initializes a new pruning job.
+
+        Args:
+            database_file: Path to the database file
+            max_age: Seconds after which unseen players get pruned
+            online_steamids: Steamids of the players who must be kept
+            batch_size: Rows deleted per step
+            archive_path: Database to copy the deleted rows into
+            vacuum_pages: Pages freed per vacuum step
+            callback: Called with the job when it's done
+        """
+
+        self.database_file = database_file
+        self.min_last_seen = int(time.time() - max_age)
+        self.online_steamids = tuple(online_steamids)
+        self.batch_size = batch_size
+        self.archive_path = archive_path
+        self.vacuum_pages = vacuum_pages
+        self.callback = callback
+        known = get_known_cls_ids()
+        self.hero_ids = tuple(known.union(
+            cls.cls_id for cls in get_subclasses(Hero)))
+        self.skill_ids = tuple(known.union(
+            cls.cls_id for cls in get_subclasses(Skill)))
+        self.deleted = {}
+        self.done = False
+        self._steps = None
+        self._tick_repeat = TickRepeat(self._step)
+
+    def start(self, interval=0.1):
+        """Starts running the job's steps.
+
+        Args:
+            interval: Seconds between the steps
+        """
+
+        self._steps = self._run()
+        self._tick_repeat.start(interval, 0)
+
+    def stop(self):
+        """Stops the job, keeping the already committed batches."""
+
+        self._tick_repeat.stop()
+
+    def _step(self):
+        """Runs a single step of the job."""
+
+        try:
+            next(self._steps)
+        except StopIteration:
+            self._tick_repeat.stop()
+            self.done = True
+            if self.callback:
+                self.callback(self)
+
+    def _targets(self):
+        """Gets the tables and conditions of the rows to prune.
+
+        Tables referring to a player are pruned before the players
+        table, since their conditions rely on it.
+        """
+
+        heroes = ', '.join('?' for _ in self.hero_ids)
+        skills = ', '.join('?' for _ in self.skill_ids)
+        online = ', '.join('?' for _ in self.online_steamids)
+        inactive = (
+            "SELECT steamid FROM players WHERE last_seen<? "
+            "AND steamid NOT IN ({0})".format(online)
+        )
+        inactive_args = (self.min_last_seen, ) + self.online_steamids
+        return (
+            ('skills', "hero_cls_id NOT IN ({0}) OR cls_id NOT IN ({1})"
+                .format(heroes, skills), self.hero_ids + self.skill_ids),
+            ('heroes', "cls_id NOT IN ({0})".format(heroes), self.hero_ids),
+            ('skills', "steamid IN ({0})".format(inactive), inactive_args),
+            ('heroes', "steamid IN ({0})".format(inactive), inactive_args),
+            ('hero_stats', "steamid IN ({0})".format(inactive),
+                inactive_args),
+            ('gold_ledger', "steamid IN ({0})".format(inactive),
+                inactive_args),
+            ('player_stats', "steamid IN ({0})".format(inactive),
+                inactive_args),
+            ('players', "last_seen<? AND steamid NOT IN ({0})"
+                .format(online), inactive_args)
+        )
+
+    def _run(self):
+        """Generator yielding after each committed batch."""
+
+        for table, condition, args in self._targets():
+            while self._delete_batch(table, condition, args):
+                yield
+        while self._vacuum():
+            yield
+
+    def _delete_batch(self, table, condition, args):
+        """Deletes a batch of matching rows from a table.
+
+        Returns:
+            Amount of deleted rows
+        """
+
+        columns = {
+            'heroes': 'rowid, steamid, level',
+            'player_stats': 'rowid, steamid'
+        }.get(table, 'rowid')
+        connection = sqlite3.connect(self.database_file)
+        try:
+            if self.archive_path:  # Can't be attached within a transaction
+                connection.execute(
+                    "ATTACH DATABASE ? AS archive", (self.archive_path, ))
+            with connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    "SELECT {0} FROM {1} WHERE {2} LIMIT ?".format(
+                        columns, table, condition),
+                    args + (self.batch_size, )
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return 0
+                rowids = tuple(row[0] for row in rows)
+                in_rowids = "rowid IN ({0})".format(
+                    ', '.join('?' for _ in rowids))
+                if self.archive_path:
+                    self._archive(cursor, table, in_rowids, rowids)
+                cursor.execute(
+                    "DELETE FROM {0} WHERE {1}".format(table, in_rowids),
+                    rowids
+                )
+                if table == 'heroes':
+                    self._shift_totals(cursor, rows)
+        finally:
+            connection.close()
+        if table == 'player_stats':
+            for rowid, steamid in rows:
+                leaderboard.remove(steamid)
+        self.deleted[table] = self.deleted.get(table, 0) + len(rows)
+        return len(rows)
+
+    def _archive(self, cursor, table, in_rowids, rowids):
+        """Copies rows into the attached archive database."""
+
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS archive.{0} AS "
+            "SELECT * FROM main.{0} WHERE 0".format(table)
+        )
+        cursor.execute(
+            "INSERT INTO archive.{0} SELECT * FROM main.{0} "
+            "WHERE {1}".format(table, in_rowids),
+            rowids
+        )
+
+    def _shift_totals(self, cursor, rows):
+        """Removes deleted heroes' levels from the total levels."""
+
+        shifts = {}
+        for rowid, steamid, level in rows:
+            shifts[steamid] = shifts.get(steamid, 0) + level
+        for steamid, shift in shifts.items():
+            cursor.execute(
+                "UPDATE player_stats SET total_level=total_level-? "
+                "WHERE steamid=?",
+                (shift, steamid)
+            )
+            total_level = leaderboard.total_level(steamid)
+            if total_level is not None:
+                leaderboard.update(steamid, total_level - shift)
+
+    def _vacuum(self):
+        """Frees a batch of unused pages if incremental vacuum is on.
+
+        Returns:
+            True if there are still free pages left
+        """
+
+        with sqlite3.connect(self.database_file) as connection:
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != 2:  # Not INCREMENTAL
+                return False
+            cursor.execute(
+                "PRAGMA incremental_vacuum({0:d})".format(self.vacuum_pages)
+            )
+            cursor.fetchall()
+            cursor.execute("PRAGMA freelist_count")
+            return cursor.fetchone()[0] > 0
\ No newline at end of file
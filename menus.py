@@ -0,0 +1,255 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.heroes import get_hero_infos
+from herowars.heroes import get_hero_class
+
+from herowars.player import players
+
+from herowars.database import save_hero_data
+
+from herowars.tools import find_element
+
+from herowars.configs import database_path
+
+# Source.Python
+from menus import SimpleMenu
+from menus import SimpleOption
+from menus import Text
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'send_shop_menu',
+    'send_hero_menu',
+    'refresh',
+    'forget_player'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Heroes per menu page, the rest of the choices are for paging
+PAGE_SIZE = 7
+
+_shop_pages = None  # Tuple of pages, each a tuple of _ShopRow objects
+_overlays = {}  # steamid: _PlayerOverlay
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class _ShopRow(object):
+    """Pre-built shop entry of a hero class."""
+
+    __slots__ = (
+        'cls_id', 'name', 'cost', 'required_level', 'allowed_users', 'text'
+    )
+
+    def __init__(self, info):
+        self.cls_id = info.cls_id
+        self.name = info.name
+        self.cost = info.cost
+        self.required_level = info.required_level
+        self.allowed_users = info.allowed_users
+        self.text = '{0} - {1} gold'.format(info.name, info.cost)
+
+
+class _PlayerOverlay(object):
+    """Player's state shown on top of the pre-built pages.
+
+    Attributes:
+        key: Player's heroes and their levels the overlay was built of
+        owned: Dictionary of owned heroes' class ids and levels
+        total_level: Sum of the owned heroes' levels
+    """
+
+    __slots__ = ('key', 'owned', 'total_level')
+
+    def __init__(self, key):
+        self.key = key
+        self.owned = dict(key)
+        self.total_level = sum(self.owned.values())
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def refresh():
+    """Forgets the pre-built pages, e.g. after reloading heroes."""
+
+    global _shop_pages
+    _shop_pages = None
+
+
+def forget_player(player):
+    """Forgets a player's overlay upon disconnection.
+
+    Args:
+        player: Player whose overlay to forget
+    """
+
+    _overlays.pop(player.steamid, None)
+
+
+def _get_shop_pages():
+    """Gets the shop pages, building them on first use."""
+
+    global _shop_pages
+    if _shop_pages is None:
+        rows = [_ShopRow(info) for info in get_hero_infos()]
+        _shop_pages = tuple(
+            tuple(rows[i:i + PAGE_SIZE])
+            for i in range(0, len(rows), PAGE_SIZE)
+        ) or ((), )
+    return _shop_pages
+
+
+def _get_overlay(player):
+    """Gets a player's overlay, rebuilding it if his heroes changed.
+
+    Only the player's own heroes are compared, so the check costs
+    the same no matter how many heroes there are on the server.
+    """
+
+    key = tuple((hero.cls_id, hero.level) for hero in player.heroes)
+    overlay = _overlays.get(player.steamid)
+    if overlay is None or overlay.key != key:
+        overlay = _overlays[player.steamid] = _PlayerOverlay(key)
+    return overlay
+
+
+def _can_buy(player, overlay, row):
+    """Checks if a player can buy a hero of a shop row."""
+
+    return (
+        row.cls_id not in overlay.owned
+        and player.gold >= row.cost
+        and overlay.total_level >= row.required_level
+        and (not row.allowed_users or player.steamid in row.allowed_users)
+    )
+
+
+def _build_menu(title, page, page_count, options, callback):
+    """Builds a page of a menu.
+
+    Args:
+        title: Title of the menu
+        page: Index of the page
+        page_count: Amount of pages
+        options: Tuples of text, value and is the option selectable
+        callback: Selection callback of the menu
+
+    Returns:
+        New SimpleMenu
+    """
+
+    menu = SimpleMenu(select_callback=callback)
+    menu.append(Text('{0} ({1}/{2})'.format(title, page + 1, page_count)))
+    for choice, (text, value, selectable) in enumerate(options, 1):
+        menu.append(SimpleOption(choice, text, value, selectable, selectable))
+    if page > 0:
+        menu.append(SimpleOption(8, 'Previous', ('page', page - 1)))
+    if page + 1 < page_count:
+        menu.append(SimpleOption(9, 'Next', ('page', page + 1)))
+    menu.append(SimpleOption(0, 'Close', None))
+    return menu
+
+
+def send_shop_menu(player, page=0):
+    """Sends a page of the hero shop to a player.
+
+    The heroes' entries are pre-built, only the player's owned,
+    level and affordable state is added when the page is sent.
+
+    Args:
+        player: Player to send the menu to
+        page: Index of the page
+    """
+
+    pages = _get_shop_pages()
+    page = max(0, min(page, len(pages) - 1))
+    overlay = _get_overlay(player)
+    options = []
+    for row in pages[page]:
+        level = overlay.owned.get(row.cls_id)
+        if level is not None:
+            options.append(
+                ('{0} - owned, level {1}'.format(row.name, level), None,
+                 False))
+        else:
+            options.append(
+                (row.text, ('buy', row.cls_id),
+                 _can_buy(player, overlay, row)))
+    _build_menu(
+        'Hero shop', page, len(pages), options, _select_shop
+    ).send(player.index)
+
+
+def _select_shop(menu, index, choice):
+    """Buys the chosen hero or changes the shop's page."""
+
+    player = find_element(players, 'index', index)
+    if player is None or choice.value is None:
+        return
+    action, value = choice.value
+    if action == 'page':
+        send_shop_menu(player, value)
+        return
+    for page in _get_shop_pages():
+        row = find_element(page, 'cls_id', value)
+        if row is not None:
+            break
+    hero_cls = get_hero_class(value)
+    if row is None or hero_cls is None \
+            or not _can_buy(player, _get_overlay(player), row):
+        return
+    player.add_gold(-row.cost, row.cls_id)
+    hero = hero_cls()
+    player.heroes.append(hero)
+    save_hero_data(database_path, player.steamid, hero)
+
+
+def send_hero_menu(player, page=0):
+    """Sends a page of a player's heroes to switch between.
+
+    Args:
+        player: Player to send the menu to
+        page: Index of the page
+    """
+
+    heroes = player.heroes
+    page_count = max(1, (len(heroes) + PAGE_SIZE - 1) // PAGE_SIZE)
+    page = max(0, min(page, page_count - 1))
+    options = [
+        ('{0} - level {1}'.format(hero.name, hero.level), ('hero', i),
+         hero is not player.hero)
+        for i, hero in enumerate(
+            heroes[page * PAGE_SIZE:(page + 1) * PAGE_SIZE],
+            page * PAGE_SIZE)
+    ]
+    _build_menu(
+        'Heroes', page, page_count, options, _select_hero
+    ).send(player.index)
+
+
+def _select_hero(menu, index, choice):
+    """Switches to the chosen hero or changes the menu's page."""
+
+    player = find_element(players, 'index', index)
+    if player is None or choice.value is None:
+        return
+    action, value = choice.value
+    if action == 'page':
+        send_hero_menu(player, value)
+    elif value < len(player.heroes):
+        player.hero = player.heroes[value]
@@ -7,14 +7,33 @@ from herowars.database import load_player_data
 from herowars.database import save_player_data
 from herowars.database import load_hero_data
 from herowars.database import save_hero_data
+from herowars.database import pop_invalidations
 
-from herowars.entities import Hero
+from herowars.heroes import get_hero_class
+from herowars.heroes import get_hero_infos
+
+from herowars.leaderboard import leaderboard
+
+from herowars.handoff import restore_player
+from herowars.handoff import is_fresh
+
+from herowars.spatial import PlayerPositions
+
+from herowars.status import Burn
+from herowars.status import Freeze
+from herowars.status import Push
+from herowars.status import status_engine
+
+from herowars.goldledger import gold_ledger
 
 from herowars.tools import find_element
 
 from herowars.configs import database_path
+from herowars.configs import handoff_max_age
 
 # Source.Python
+from engines.server import global_vars
+from mathlib import Vector
 from players.entity import PlayerEntity
 from players.helpers import index_from_userid
 
@@ -27,7 +46,12 @@ __all___ = (
     'player',
     'get_player',
     'create_player',
-    'remove_player'
+    'save_player',
+    'remove_player',
+    'refresh_invalidated_players',
+    'set_handoff',
+    'get_positions',
+    'get_cache_stats'
 )
 
 
@@ -37,6 +61,16 @@ __all___ = (
 
 players = []
 
+# Player data handed over from before a plugin reload, by steamid
+_handoff = {}
+_handoff_created = None  # Creation time of the handed over snapshot
+
+# Tick and players' positions snapshot of that tick
+_positions = (None, None)
+
+# Property name: [hits, misses] of the per-tick property cache
+_cache_stats = {}
+
 
 # ======================================================================
 # >> FUNCTIONS
@@ -69,16 +103,139 @@ def create_player(userid):
     """
 
     player = _Player(index_from_userid(userid))
-    load_player_data(database_path, player)
-    if not player.heroes:
-        first_hero_cls = Hero.get_subclasses()[0]
-        player.heroes.append(first_hero_cls())
-    if not player.hero:
-        player._hero = player.heroes[0]
+    _load_player(player, _take_handoff(player.steamid))
     players.append(player)
     return player
 
 
+def set_handoff(created, data):
+    """Sets the player data handed over from before a plugin reload.
+
+    Players found in the data are restored from it instead of the
+    database when they get created, as long as the data is fresh.
+
+    Args:
+        created: Creation time of the data, None for no data
+        data: Dictionary of steamids and player data
+    """
+
+    global _handoff_created
+    _handoff_created = created
+    _handoff.clear()
+    _handoff.update(data)
+
+
+def _take_handoff(steamid):
+    """Takes a player's handed over data if it's still fresh.
+
+    The age and the database's modification time are checked again,
+    since the player may be created long after the data was loaded.
+    Stale data is forgotten for every player.
+
+    Args:
+        steamid: Steamid of the player
+
+    Returns:
+        Player's data, None to load him from the database
+    """
+
+    data = _handoff.pop(steamid, None)
+    if data is None:
+        return None
+    if _handoff_created is None \
+            or not is_fresh(_handoff_created, database_path, handoff_max_age):
+        set_handoff(None, {})
+        return None
+    return data
+
+
+def _load_player(player, handoff=None):
+    """Loads player's data, giving him a hero if he has none.
+
+    Args:
+        player: Player whose data to load
+        handoff: Player's handed over data, None to use the database
+    """
+
+    if handoff is not None:
+        restore_player(player, handoff)
+    else:
+        if gold_ledger.has_pending(player.steamid):
+            gold_ledger.flush()
+        load_player_data(database_path, player)
+    loaded = bool(player.heroes)
+    if not player.heroes:
+        for info in get_hero_infos():
+            first_hero_cls = get_hero_class(info.cls_id)
+            if first_hero_cls is not None:
+                player.heroes.append(first_hero_cls())
+                break
+    if not player.hero and player.heroes:
+        player._hero = player.heroes[0]
+    if loaded:
+        player.mark_saved()
+    leaderboard.update(player.steamid, player.total_level)
+
+
+def refresh_invalidated_players():
+    """Reloads players whose data was changed by another server.
+
+    Players who have unsaved changes on this server are kept as they
+    are, their data will overwrite the other server's on next save.
+    """
+
+    for steamid in pop_invalidations():
+        player = find_element(players, 'steamid', steamid)
+        if player and not player.dirty:
+            player._hero = None
+            player.heroes = []
+            _load_player(player)
+
+
+def save_player(player):
+    """Saves player's data into the database.
+
+    Also marks the player clean and updates his leaderboard entry.
+
+    Args:
+        player: Player whose data to save
+    """
+
+    save_player_data(database_path, player)
+    player.mark_saved()
+    leaderboard.update(player.steamid, player.total_level)
+
+
+def get_positions():
+    """Gets a snapshot of the players' positions for area skills.
+
+    The snapshot is taken once per tick, on first use.
+
+    Returns:
+        PlayerPositions of the current tick
+    """
+
+    global _positions
+    tick, positions = _positions
+    if tick != global_vars.tick_count:
+        positions = PlayerPositions.from_players(players)
+        _positions = (global_vars.tick_count, positions)
+    return positions
+
+
+def get_cache_stats():
+    """Gets the hit rates of the per-tick property cache.
+
+    Returns:
+        Dictionary of property names and (hits, misses, hit rate)
+    """
+
+    return {
+        name: (hits, misses, hits / (hits + misses) if hits + misses else 0)
+        for name, (hits, misses) in _cache_stats.items()
+    }
+
+
 def remove_player(userid):
     """Removes a player, inserting his data into the database.
 
@@ -88,7 +245,7 @@ def remove_player(userid):
 
     player = get_player(userid)
     if player:
-        save_player_data(database_path, player)
+        save_player(player)
         players.remove(player)
 
 
@@ -96,12 +253,64 @@ def remove_player(userid):
 # >> CLASSES
 # ======================================================================
 
+class _TickCachedProperty(object):
+    """Caches a PlayerEntity property until the end of the tick.
+
+    The first read of the property on each tick crosses into the
+    engine, the rest of the reads on the same tick return the cached
+    value. Setting the property through Hero Wars writes it into the
+    engine and drops the cached value.
+
+    Mutable values, such as vectors, are copied on every read, so
+    a reader changing its value in place can't change the cached one.
+    """
+
+    def __init__(self, name, copy=None):
+        """Wraps PlayerEntity's property of the given name.
+
+        Args:
+            name: Name of the property
+            copy: Function copying a value for a reader, None for
+                immutable values
+        """
+
+        self.name = name
+        self.copy = copy
+        self.base = getattr(PlayerEntity, name)
+        self.stats = _cache_stats.setdefault(name, [0, 0])
+
+    def __get__(self, player, owner):
+        if player is None:
+            return self
+        tick = global_vars.tick_count
+        if player._cache_tick != tick:
+            player._cache.clear()
+            player._cache_tick = tick
+        try:
+            value = player._cache[self.name]
+        except KeyError:
+            self.stats[1] += 1
+            value = player._cache[self.name] = self.base.__get__(player, owner)
+        else:
+            self.stats[0] += 1
+        if self.copy is not None:
+            return self.copy(value)
+        return value
+
+    def __set__(self, player, value):
+        self.base.__set__(player, value)
+        player._cache.pop(self.name, None)
+
+
 class _Player(PlayerEntity):
     """Player class for Hero Wars related activity.
 
     Player extends Source.Python's PlayerEntity, implementing player
     sided properties for Hero Wars related information.
-    Adds methods such as burn, freeze and push.
+    Adds methods such as burn, freeze and push, whose effects are run
+    by the status engine (see status.py).
+    Commonly read engine properties (health, armor, origin, team and
+    dead) are cached for the rest of the tick on first read.
 
     Attributes:
         gold: Player's Hero Wars gold, used to purchase heroes and items
@@ -109,6 +318,13 @@ class _Player(PlayerEntity):
         heroes: List of owned heroes
     """
 
+    health = _TickCachedProperty('health')
+    armor = _TickCachedProperty('armor')
+    origin = _TickCachedProperty(
+        'origin', lambda vector: Vector(vector.x, vector.y, vector.z))
+    team = _TickCachedProperty('team')
+    dead = _TickCachedProperty('dead')
+
     def __new__(cls, index, gold=0):
         """Creates a new Hero Wars player.
 
@@ -121,8 +337,41 @@ class _Player(PlayerEntity):
         self._gold = gold
         self._hero = None
         self.heroes = []
+        self._saved_state = None
+        self._cache = {}
+        self._cache_tick = None
         return self
 
+    def _get_state(self):
+        """Gets the part of player's data that gets saved.
+
+        Gold isn't included, it's saved by the gold ledger.
+
+        Returns:
+            Tuple of current hero and its levels and exp
+        """
+
+        hero = self._hero
+        return (
+            hero.cls_id, hero.level, hero.exp,
+            tuple(skill.level for skill in hero.skills)
+        )
+
+    @property
+    def dirty(self):
+        """Has player's data changed since it was last saved.
+
+        Returns:
+            True if the player needs to be saved
+        """
+
+        return self._get_state() != self._saved_state
+
+    def mark_saved(self):
+        """Marks player's current data as saved."""
+
+        self._saved_state = self._get_state()
+
     @property
     def gold(self):
         """Getter for player's Hero Wars gold.
@@ -137,13 +386,41 @@ class _Player(PlayerEntity):
     def gold(self, gold):
         """Setter for player's Hero Wars gold.
 
+        The change is recorded into the gold ledger.
+
         Raises:
             ValueError: If gold is set to a negative value
         """
 
-        if gold < 0:
+        self.add_gold(gold - self._gold)
+
+    def add_gold(self, amount, reason=None):
+        """Adds gold to the player, recording it into the gold ledger.
+
+        Args:
+            amount: Amount of gold to add, negative to take gold
+            reason: Description of the change, e.g. a purchased
+                hero's or item's class id
+
+        Raises:
+            ValueError: If the player's gold would become negative
+        """
+
+        if self._gold + amount < 0:
             raise ValueError('Attempt to set negative gold for a player.')
-        self._gold = gold
+        if amount:
+            gold_ledger.record(self.steamid, amount, reason)
+            self._gold += amount
+
+    @property
+    def total_level(self):
+        """Gets the sum of the levels of player's heroes.
+
+        Returns:
+            Player's total level
+        """
+
+        return sum(hero.level for hero in self.heroes)
 
     @property
     def hero(self):
@@ -174,4 +451,46 @@ class _Player(PlayerEntity):
                 cls_id=hero.cls_id, steamid=self.steamid
             ))
         save_hero_data(database_path, self.steamid, self.hero)
-        self._hero = hero
\ No newline at end of file
+        self._hero = hero
+
+    def burn(self, damage, duration, interval=1, attacker=None):
+        """Burns the player, dealing damage every interval.
+
+        Args:
+            damage: Damage dealt every interval
+            duration: Seconds the burn lasts
+            interval: Seconds between the damage
+            attacker: Player credited if the burn kills, None for none
+
+        Returns:
+            Player's Burn effect
+        """
+
+        return status_engine.apply(
+            self, Burn, duration, interval=interval, damage=damage,
+            attacker=attacker)
+
+    def freeze(self, duration):
+        """Freezes the player in place.
+
+        Args:
+            duration: Seconds the freeze lasts
+
+        Returns:
+            Player's Freeze effect
+        """
+
+        return status_engine.apply(self, Freeze, duration)
+
+    def push(self, vector, duration=0):
+        """Pushes the player with a velocity.
+
+        Args:
+            vector: Velocity to push the player with
+            duration: Seconds the push lasts, 0 for a single push
+
+        Returns:
+            Player's Push effect
+        """
+
+        return status_engine.apply(self, Push, duration, vector=vector)
\ No newline at end of file
@@ -0,0 +1,132 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python
+from collections import Counter
+import sys
+import threading
+import time
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'SamplingProfiler',
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class SamplingProfiler(object):
+    """Samples the stack of a thread for a while.
+
+    A worker thread periodically takes the current stack of the
+    profiled thread and counts identical stacks, so nothing runs
+    on the profiled thread itself and nothing runs at all while
+    the profiler isn't started. Frames are labeled with their module
+    and qualified name, e.g. 'warden:ShadowStrike.on_attack', which
+    attributes the samples to the skills' classes. Only the frames'
+    code objects are read, never the profiled thread's locals. The
+    results are written in the collapsed stack format used by flame
+    graph tools.
+
+    Attributes:
+        samples: Counter of collapsed stacks
+        done: Has the sampling finished
+        error: Exception that stopped the profiler, if any
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        """Initializes a new profiler.
+
+        Args:
+            thread_id: Identifier of the thread to profile
+            interval: Seconds between the samples
+        """
+
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.done = False
+        self.error = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """Is the profiler sampling."""
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, path=None):
+        """Starts sampling on a worker thread.
+
+        Args:
+            duration: Seconds to sample for
+            path: File to write the collapsed stacks into when done
+        """
+
+        self._thread = threading.Thread(
+            target=self._run, args=(duration, path), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling before the duration has passed."""
+
+        self._stopped.set()
+
+    def _run(self, duration, path):
+        """Takes samples until the duration has passed.
+
+        The profiler is marked done even if sampling or writing fails,
+        the exception is stored in error.
+        """
+
+        try:
+            end = time.time() + duration
+            while time.time() < end and not self._stopped.is_set():
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    self.samples[self._collapse(frame)] += 1
+                del frame
+                time.sleep(self.interval)
+            if path:
+                self.write(path)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done = True
+
+    def _collapse(self, frame):
+        """Gets a frame's stack as a ';' separated string, root first."""
+
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    @staticmethod
+    def _label(frame):
+        """Gets a frame's label of its module and qualified name."""
+
+        code = frame.f_code
+        return '{0}:{1}'.format(
+            frame.f_globals.get('__name__', '?'),
+            getattr(code, 'co_qualname', code.co_name))
+
+    def write(self, path):
+        """Writes the samples in the collapsed stack format.
+
+        Args:
+            path: File to write into
+        """
+
+        with open(path, 'w') as collapsed_file:
+            for stack, count in self.samples.most_common():
+                collapsed_file.write('{0} {1}\n'.format(stack, count))
\ No newline at end of file
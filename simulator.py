@@ -0,0 +1,794 @@
+"""Offline hero balance simulator.
+
+Imports the hero modules with stand-ins for the Source.Python modules,
+profiles every hero level by level, and runs vectorized duels between
+the profiles with NumPy:
+
+    python -m herowars.simulator --level 20 --duels 100000
+
+Each skill's on_spawn, on_attack and on_defend methods are called
+without their chance and cooldown decorators against recording
+players, and the averaged effects (damage, heals, burns, freezes) are
+stored per level along with the decorators' gates. The duels then
+roll the chance gates and track the cooldowns for every duel at once.
+Skills are leveled evenly up to their max_level. Positions, pushes and
+conditions on the players' state aren't modelled.
+
+Large matchup sweeps are split over processes. Run from the directory
+containing the herowars package.
+"""
+
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import importlib.util
+import os
+import sys
+import time
+import types
+
+# NumPy
+import numpy
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'install_standins',
+    'HeroProfile',
+    'profile_hero',
+    'load_profiles',
+    'simulate_duels',
+    'win_rate_matrix',
+    'damage_curves',
+    'main'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+BASE_HEALTH = 100
+BASE_DAMAGE = 25  # Average damage of a weapon hit
+DAMAGE_SPREAD = 0.2  # Hits deal BASE_DAMAGE +- 20%
+ARMOR_RATIO = 0.5  # Share of a hit's damage absorbed by armor
+ATTACK_INTERVAL = 0.5  # Seconds between a player's shots
+HIT_CHANCE = 0.75
+MAX_TIME = 60  # Seconds before a duel is called a draw
+
+# Health given to the profiled players, so clamping never kicks in
+_PROFILE_HEALTH = 10 ** 6
+
+# Profiles of the worker processes, set by _init_worker()
+_worker_profiles = None
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class _StandInTickRepeat(object):
+    """Stand-in for TickRepeat, never calls its callback."""
+
+    def __init__(self, callback, *args, **kwargs):
+        self.callback = callback
+        self.remaining = 0
+
+    def start(self, interval, limit):
+        self.remaining = limit
+
+    def stop(self):
+        self.remaining = 0
+
+
+class _StandInProperty(object):
+    """Plain property of the stand-in PlayerEntity."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, player, owner):
+        if player is None:
+            return self
+        return player._values.get(self.name, 0)
+
+    def __set__(self, player, value):
+        player._values[self.name] = value
+
+
+class _StandInPlayerEntity(object):
+    """Stand-in for PlayerEntity, properties are plain values."""
+
+    health = _StandInProperty('health')
+    armor = _StandInProperty('armor')
+    origin = _StandInProperty('origin')
+    team = _StandInProperty('team')
+    dead = _StandInProperty('dead')
+
+    def __new__(cls, index, *args, **kwargs):
+        self = object.__new__(cls)
+        self.index = index
+        self._values = {}
+        return self
+
+
+class _StandInGlobalVars(object):
+    """Stand-in for engines.server.global_vars."""
+
+    tick_count = 0
+    current_time = 0.0
+
+
+class _StandInMoveType(object):
+    """Stand-in for entities.constants.MoveType."""
+
+    NONE = 0
+    WALK = 2
+
+
+class _StandInVector(object):
+    """Stand-in for mathlib.Vector."""
+
+    def __init__(self, x=0, y=0, z=0):
+        self.x, self.y, self.z = x, y, z
+
+
+class _StandInMenuItem(object):
+    """Stand-in for the menu classes, sending does nothing."""
+
+    def __init__(self, *args, **kwargs):
+        self.items = []
+
+    def append(self, item):
+        self.items.append(item)
+
+    def send(self, *indexes):
+        pass
+
+
+class _SimGameEvent(object):
+    """Game event behind the simulated EventViews, all fields empty."""
+
+    def get_int(self, name):
+        return 0
+
+    def get_string(self, name):
+        return ''
+
+    def get_bool(self, name):
+        return False
+
+    def get_float(self, name):
+        return 0.0
+
+
+class _SimPlayer(object):
+    """Player stand-in recording what skills do to it."""
+
+    def __init__(self, hero, userid):
+        self.hero = hero
+        self.heroes = [hero]
+        self.userid = self.index = userid
+        self.steamid = 'SIMULATED_{0}'.format(userid)
+        self.health = _PROFILE_HEALTH
+        self.armor = 0
+        self.gold = 0
+        self.team = 2 + userid % 2
+        self.dead = False
+        self.origin = (0, 0, 0)
+        self.base_velocity = None
+        self.move_type = _StandInMoveType.WALK
+        self.burn_damage = 0
+        self.freeze_time = 0
+
+    def burn(self, damage, duration, interval=1, attacker=None):
+        self.burn_damage += damage * int(duration / interval)
+
+    def freeze(self, duration):
+        self.freeze_time = max(self.freeze_time, duration)
+
+    def push(self, vector, duration=0):
+        pass
+
+    def take_damage(self, damage, attacker_index=None, **kwargs):
+        self.health -= damage
+
+    def add_gold(self, amount, reason=None):
+        self.gold += amount
+
+
+class _TriggerProfile(object):
+    """Per-level effects of the skills reacting to one kind of event.
+
+    Arrays are indexed by [level index, slot], a slot per entity
+    having the event's method.
+
+    Attributes:
+        active: Is the slot's entity active on the level
+        enemy_damage: Average damage dealt to the opponent
+        self_heal: Average health gained, negative for self-damage
+        stun: Average seconds the opponent is frozen for
+        gates: Tuple per slot of (kind, values by level index) gates,
+            outermost first, kind being 'chance' (probability) or
+            'cooldown' (seconds)
+    """
+
+    def __init__(self, level_count, slot_count):
+        shape = (level_count, slot_count)
+        self.active = numpy.zeros(shape, bool)
+        self.enemy_damage = numpy.zeros(shape)
+        self.self_heal = numpy.zeros(shape)
+        self.stun = numpy.zeros(shape)
+        self.gates = tuple(() for _ in range(slot_count))
+
+
+class HeroProfile(object):
+    """A hero's numbers on each of its levels.
+
+    Plain NumPy data, so profiles can be sent to worker processes.
+
+    Attributes:
+        cls_id: Class id of the hero
+        name: Name of the hero
+        levels: Array of the profiled levels
+        health, armor: Health and armor after spawning
+        damage, damage_taken: (flat, percent) modifiers of the dealt
+            and the taken damage, shape (levels, 2)
+        attack: _TriggerProfile of on_attack
+        defend: _TriggerProfile of on_defend
+    """
+
+    def __init__(self, cls_id, name, levels):
+        self.cls_id = cls_id
+        self.name = name
+        self.levels = numpy.asarray(levels)
+        count = len(self.levels)
+        self.health = numpy.zeros(count)
+        self.armor = numpy.zeros(count)
+        self.damage = numpy.zeros((count, 2))
+        self.damage_taken = numpy.zeros((count, 2))
+        self.attack = None
+        self.defend = None
+
+    def level_index(self, level):
+        """Gets the index of a level, capped to the profiled levels."""
+
+        return int(min(max(level, self.levels[0]), self.levels[-1])
+                   - self.levels[0])
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def install_standins():
+    """Installs stand-ins for the missing Source.Python modules.
+
+    Must be called before importing any Hero Wars module. Modules
+    that can be imported for real are left alone.
+    """
+
+    identity = lambda function: function
+    modules = {
+        'listeners': {'LevelShutdown': identity},
+        'listeners.tick': {},
+        'listeners.tick.repeat': {'TickRepeat': _StandInTickRepeat},
+        'engines': {},
+        'engines.server': {'global_vars': _StandInGlobalVars()},
+        'players': {},
+        'players.entity': {'PlayerEntity': _StandInPlayerEntity},
+        'players.helpers': {'index_from_userid': identity},
+        'entities': {},
+        'entities.constants': {'MoveType': _StandInMoveType},
+        'mathlib': {'Vector': _StandInVector},
+        'events': {'Event': identity},
+        'commands': {},
+        'commands.server': {'ServerCommand': lambda *names: identity},
+        'menus': {
+            'SimpleMenu': _StandInMenuItem,
+            'SimpleOption': _StandInMenuItem,
+            'Text': _StandInMenuItem
+        }
+    }
+    missing = set()
+    for name in modules:
+        top = name.split('.')[0]
+        if top not in sys.modules and importlib.util.find_spec(top) is None:
+            missing.add(top)
+    for name, attributes in modules.items():
+        if name.split('.')[0] not in missing:
+            continue
+        module = types.ModuleType(name)
+        module.__path__ = []  # Allow importing submodules
+        vars(module).update(attributes)
+        sys.modules[name] = module
+        if '.' in name:
+            parent, child = name.rsplit('.', 1)
+            setattr(sys.modules[parent], child, module)
+
+
+def _level_skills(hero, level):
+    """Sets a hero's level and spends its points evenly on the skills.
+
+    Skills are leveled one at a time in order, up to their max_level.
+    """
+
+    hero.level = level
+    for skill in hero.skills:
+        skill.level = 0
+    points = level
+    while points > 0:
+        spent = points
+        for skill in hero.skills:
+            if points and (skill.max_level <= 0
+                           or skill.level < skill.max_level):
+                skill.level += 1
+                points -= 1
+        if spent == points:
+            break  # Every skill is maxed
+
+
+def _get_method(entity, method_name):
+    """Gets an entity's method and the gates of its decorators.
+
+    Returns:
+        Tuple of the undecorated method and its gates, outermost first
+    """
+
+    method = getattr(type(entity), method_name)
+    undecorated = method.__dict__.get('undecorated', method)
+    return undecorated, tuple(reversed(method.__dict__.get('gates', ())))
+
+
+def _run_method(hero, method_name, entity, samples, as_defender):
+    """Calls an undecorated method against recording players.
+
+    Returns:
+        Tuple of the averaged (enemy damage, self heal, stun) and
+        an event for evaluating chancef and cooldownf functions
+    """
+
+    from herowars.eventview import EventView
+
+    method, _ = _get_method(entity, method_name)
+    totals = numpy.zeros(3)
+    event = None
+    for _ in range(samples):
+        owner = _SimPlayer(hero, 1)
+        enemy = _SimPlayer(None, 2)
+        attacker, defender = (enemy, owner) if as_defender \
+            else (owner, enemy)
+        event = EventView(_SimGameEvent(), damage=BASE_DAMAGE,
+                          weapon='ak47')
+        event.attacker, event.defender = attacker.userid, defender.userid
+        event.attacker_player = attacker
+        event.defender_player = defender
+        if method_name == 'on_spawn':
+            event.userid, event.player = owner.userid, owner
+        try:
+            method(entity, event)
+        except Exception as error:
+            print('Skipped {0}.{1}: {2!r}'.format(
+                type(entity).__name__, method_name, error), file=sys.stderr)
+            return totals, event
+        event.effects.resolve()
+        totals += (
+            _PROFILE_HEALTH - enemy.health + enemy.burn_damage,
+            owner.health - _PROFILE_HEALTH - owner.burn_damage,
+            enemy.freeze_time
+        )
+    return totals / samples, event
+
+
+def _evaluate_gates(entity, method_name, event):
+    """Evaluates a method's gates on the entity's current level.
+
+    Returns:
+        Tuple of (kind, value) pairs, chances as probabilities
+        and cooldowns in seconds
+    """
+
+    gates = []
+    for kind, value in _get_method(entity, method_name)[1]:
+        if kind == 'chancef':
+            kind, value = 'chance', value(entity, event)
+        elif kind == 'cooldownf':
+            kind, value = 'cooldown', value(entity, event)
+        if kind == 'chance':  # randint(0, 100) <= percentage
+            value = min(max((value + 1) / 101, 0), 1)
+        gates.append((kind, value))
+    return gates
+
+
+def _profile_trigger(hero, levels, method_name, samples, as_defender):
+    """Profiles the skills reacting to an event on every level."""
+
+    entities = [
+        entity for entity in hero.passives + hero.skills
+        if getattr(type(entity), method_name, None)
+    ]
+    trigger = _TriggerProfile(len(levels), len(entities))
+    gates = [[] for _ in entities]
+    for index, level in enumerate(levels):
+        _level_skills(hero, level)
+        active = hero._get_active_entities()
+        for slot, entity in enumerate(entities):
+            effects, event = _run_method(
+                hero, method_name, entity, samples, as_defender)
+            trigger.active[index, slot] = entity in active
+            trigger.enemy_damage[index, slot] = effects[0]
+            trigger.self_heal[index, slot] = effects[1]
+            trigger.stun[index, slot] = effects[2]
+            gates[slot].append(_evaluate_gates(entity, method_name, event))
+    trigger.gates = tuple(
+        tuple(
+            (level_gates[0][i][0],
+             numpy.array([gates_of_level[i][1]
+                          for gates_of_level in level_gates]))
+            for i in range(len(level_gates[0]))
+        ) if level_gates and level_gates[0] else ()
+        for level_gates in gates
+    )
+    return trigger
+
+
+def profile_hero(hero_cls, samples=16):
+    """Profiles a hero class on each of its levels.
+
+    Args:
+        hero_cls: Hero class to profile
+        samples: Calls averaged per method, for skills using randomness
+
+    Returns:
+        New HeroProfile
+    """
+
+    hero = hero_cls()
+    max_level = hero_cls.max_level if hero_cls.max_level > 0 else 70
+    levels = list(range(max_level + 1))
+    profile = HeroProfile(hero_cls.cls_id, hero_cls.name, levels)
+    profile.attack = _profile_trigger(
+        hero, levels, 'on_attack', samples, False)
+    profile.defend = _profile_trigger(
+        hero, levels, 'on_defend', samples, True)
+    spawn = _profile_trigger(hero, levels, 'on_spawn', samples, False)
+    for index, level in enumerate(levels):
+        _level_skills(hero, level)
+        modifiers = hero.modifiers
+        health = modifiers.apply('health', BASE_HEALTH)
+        armor = modifiers.apply('armor', 0)
+        for slot, gates in enumerate(spawn.gates):
+            if spawn.active[index, slot]:
+                chance = numpy.prod([
+                    values[index] for kind, values in gates
+                    if kind == 'chance'
+                ])
+                health += chance * spawn.self_heal[index, slot]
+        profile.health[index] = max(1, int(health))
+        profile.armor[index] = max(0, int(armor))
+        profile.damage[index] = modifiers.get('damage')
+        profile.damage_taken[index] = modifiers.get('damage_taken')
+    return profile
+
+
+def load_profiles(cls_ids=None, samples=16):
+    """Imports the hero modules and profiles the heroes.
+
+    Args:
+        cls_ids: Class ids of the heroes to profile, enabled heroes
+            by default
+        samples: Calls averaged per method
+
+    Returns:
+        List of HeroProfiles
+    """
+
+    install_standins()
+    from herowars.heroes import get_hero_infos
+    from herowars.heroes import get_hero_class
+
+    if cls_ids is None:
+        cls_ids = [info.cls_id for info in get_hero_infos()]
+    profiles = []
+    for cls_id in cls_ids:
+        hero_cls = get_hero_class(cls_id)
+        if hero_cls is None:
+            raise ValueError('No hero {0}.'.format(cls_id))
+        profiles.append(profile_hero(hero_cls, samples))
+    return profiles
+
+
+def _apply_modifier(values, modifier):
+    """Applies a (flat, percent) modifier like Modifiers.apply()."""
+
+    flat, percent = modifier
+    return (values + flat) * (100 + percent) / 100
+
+
+def _fire_trigger(trigger, index, mask, now, ready, rng):
+    """Fires the skills of a trigger for the duels in mask.
+
+    Rolls the chance gates and checks and starts the cooldowns,
+    outermost gate first, like the decorators do.
+
+    Args:
+        trigger: _TriggerProfile to fire
+        index: Level index of the trigger's hero
+        mask: Boolean array of the duels the event happened in
+        now: Time of the event
+        ready: Per slot and gate arrays of the cooldowns' end times
+        rng: NumPy random generator
+
+    Returns:
+        Arrays of the enemy damage, self heal and stun
+    """
+
+    size = len(mask)
+    damage = numpy.zeros(size)
+    heal = numpy.zeros(size)
+    stun = numpy.zeros(size)
+    for slot, gates in enumerate(trigger.gates):
+        if not trigger.active[index, slot]:
+            continue
+        fired = mask
+        for gate, (kind, values) in enumerate(gates):
+            if kind == 'chance':
+                fired = fired & (rng.random(size) < values[index])
+            else:
+                fired = fired & (ready[slot][gate] <= now)
+                ready[slot][gate][fired] = now + values[index]
+        damage += fired * trigger.enemy_damage[index, slot]
+        heal += fired * trigger.self_heal[index, slot]
+        stun = numpy.maximum(stun, fired * trigger.stun[index, slot])
+    return damage, heal, stun
+
+
+def simulate_duels(profile_a, profile_b, level_a, level_b, duels,
+                   seed=None):
+    """Simulates duels between two heroes, all at once.
+
+    Both players shoot every ATTACK_INTERVAL seconds. A hit's damage
+    is modified by the attacker's damage and the victim's damage_taken
+    modifiers and partly absorbed by armor. Then the attacker's
+    on_attack and the victim's on_defend skills fire, their effects
+    being resolved like an EffectBatch: they're skipped for a player
+    the hits already killed, and may kill. Frozen players can't shoot.
+
+    Args:
+        profile_a, profile_b: HeroProfiles of the duelists
+        level_a, level_b: Levels of the duelists
+        duels: Amount of duels
+        seed: Seed of the random generator
+
+    Returns:
+        Tuple of the win rate of the first hero (draws count as
+        half a win) and the damage per second dealt by both heroes
+    """
+
+    rng = numpy.random.default_rng(seed)
+    profiles = (profile_a, profile_b)
+    indexes = (profile_a.level_index(level_a),
+               profile_b.level_index(level_b))
+    health = [numpy.full(duels, float(p.health[i]))
+              for p, i in zip(profiles, indexes)]
+    armor = [numpy.full(duels, float(p.armor[i]))
+             for p, i in zip(profiles, indexes)]
+    frozen_until = [numpy.zeros(duels), numpy.zeros(duels)]
+    dealt = [numpy.zeros(duels), numpy.zeros(duels)]
+    ready = [
+        {trigger: [[numpy.zeros(duels) for _ in gates]
+                   for gates in getattr(p, trigger).gates]
+         for trigger in ('attack', 'defend')}
+        for p in profiles
+    ]
+    running = numpy.ones(duels, bool)
+    died = [numpy.zeros(duels, bool), numpy.zeros(duels, bool)]
+    ended_at = numpy.full(duels, float(MAX_TIME))
+    now = 0.0
+    while now < MAX_TIME and running.any():
+        hits = []
+        for side in (0, 1):
+            other = 1 - side
+            hit = running & (frozen_until[side] <= now) \
+                & (rng.random(duels) < HIT_CHANCE)
+            damage = BASE_DAMAGE * rng.uniform(
+                1 - DAMAGE_SPREAD, 1 + DAMAGE_SPREAD, duels)
+            damage = _apply_modifier(
+                damage, profiles[side].damage[indexes[side]])
+            damage = _apply_modifier(
+                damage, profiles[other].damage_taken[indexes[other]])
+            damage = numpy.maximum(damage, 0) * hit
+            absorbed = numpy.minimum(armor[other], damage * ARMOR_RATIO)
+            armor[other] -= absorbed
+            hits.append((hit, damage - absorbed))
+        changes = [numpy.zeros(duels), numpy.zeros(duels)]
+        for side in (0, 1):
+            other = 1 - side
+            hit, damage = hits[side]
+            health[other] -= damage
+            dealt[side] += damage
+            attack = _fire_trigger(
+                profiles[side].attack, indexes[side], hit, now,
+                ready[side]['attack'], rng)
+            defend = _fire_trigger(
+                profiles[other].defend, indexes[other], hit, now,
+                ready[other]['defend'], rng)
+            changes[other] += defend[1] - attack[0]
+            changes[side] += attack[1] - defend[0]
+            dealt[side] += attack[0]
+            dealt[other] += defend[0]
+            frozen_until[other] = numpy.maximum(
+                frozen_until[other], now + attack[2])
+            frozen_until[side] = numpy.maximum(
+                frozen_until[side], now + defend[2])
+        for side in (0, 1):
+            alive = running & (health[side] > 0)
+            health[side][alive] += changes[side][alive]
+            died[side] |= running & (health[side] <= 0)
+        ended = running & (died[0] | died[1])
+        ended_at[ended] = now + ATTACK_INTERVAL
+        running &= ~ended
+        now += ATTACK_INTERVAL
+    wins = died[1] & ~died[0]
+    draws = died[0] == died[1]
+    win_rate = (wins.sum() + draws.sum() / 2) / duels
+    seconds = ended_at.sum()
+    return win_rate, dealt[0].sum() / seconds, dealt[1].sum() / seconds
+
+
+def _init_worker(profiles):
+    """Stores the profiles in a worker process."""
+
+    global _worker_profiles
+    _worker_profiles = profiles
+
+
+def _simulate_pair(task):
+    """Simulates the duels of a matchup in a worker process."""
+
+    a, b, level, duels, seed = task
+    return a, b, simulate_duels(
+        _worker_profiles[a], _worker_profiles[b], level, level, duels,
+        seed)[0]
+
+
+def win_rate_matrix(profiles, level, duels, processes=None, seed=0):
+    """Simulates every matchup of the heroes on the same level.
+
+    Args:
+        profiles: HeroProfiles of the heroes
+        level: Level of every hero
+        duels: Duels per matchup
+        processes: Worker processes, all cores by default, 1 to
+            simulate in this process
+        seed: Seed of the first matchup, the rest count up from it
+
+    Returns:
+        Array where [i, j] is hero i's win rate against hero j
+    """
+
+    count = len(profiles)
+    matrix = numpy.full((count, count), 0.5)
+    tasks = [
+        (a, b, level, duels, seed + number)
+        for number, (a, b) in enumerate(
+            (a, b) for a in range(count) for b in range(a + 1, count))
+    ]
+    if processes == 1:
+        _init_worker(profiles)
+        results = map(_simulate_pair, tasks)
+    else:
+        executor = ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=(profiles, ))
+        workers = processes or os.cpu_count() or 1
+        results = executor.map(
+            _simulate_pair, tasks,
+            chunksize=max(1, len(tasks) // (workers * 4)))
+    try:
+        for a, b, win_rate in results:
+            matrix[a, b] = win_rate
+            matrix[b, a] = 1 - win_rate
+    finally:
+        if processes != 1:
+            executor.shutdown()
+    return matrix
+
+
+def damage_curves(profiles):
+    """Calculates the heroes' expected damage per second by level.
+
+    Uses the profiles directly instead of simulating: every hit
+    triggers the on_attack skills at their combined chance, and
+    a cooldown adds its length to the average time between triggers.
+
+    Args:
+        profiles: HeroProfiles of the heroes
+
+    Returns:
+        List of arrays of damage per second, one per level
+    """
+
+    hits_per_second = HIT_CHANCE / ATTACK_INTERVAL
+    curves = []
+    for profile in profiles:
+        damage = _apply_modifier(
+            numpy.full(len(profile.levels), float(BASE_DAMAGE)),
+            profile.damage.T) * hits_per_second
+        trigger = profile.attack
+        for slot, gates in enumerate(trigger.gates):
+            chance = numpy.ones(len(profile.levels))
+            cooldown = numpy.zeros(len(profile.levels))
+            for kind, values in gates:
+                if kind == 'chance':
+                    chance = chance * values
+                else:
+                    cooldown = numpy.maximum(cooldown, values)
+            rate = hits_per_second * chance
+            with numpy.errstate(divide='ignore'):
+                rate = numpy.where(rate > 0, 1 / (1 / rate + cooldown), 0)
+            damage += rate * trigger.enemy_damage[:, slot] \
+                * trigger.active[:, slot]
+        curves.append(damage)
+    return curves
+
+
+def main(argv=None):
+    """Runs the simulator from the command line."""
+
+    parser = argparse.ArgumentParser(
+        description='Simulate duels between Hero Wars heroes.')
+    parser.add_argument('--heroes', help='comma separated class ids, '
+                        'all enabled heroes by default')
+    parser.add_argument('--level', type=int, default=10)
+    parser.add_argument('--duels', type=int, default=100000,
+                        help='duels per matchup')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes, all cores by default')
+    parser.add_argument('--samples', type=int, default=16,
+                        help='calls averaged per skill method')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='.npz file to save the win '
+                        'rates and damage curves into')
+    args = parser.parse_args(argv)
+
+    cls_ids = args.heroes.split(',') if args.heroes else None
+    profiles = load_profiles(cls_ids, args.samples)
+    if len(profiles) < 2:
+        parser.error('at least two heroes are needed')
+    started = time.time()
+    matrix = win_rate_matrix(
+        profiles, args.level, args.duels, args.processes, args.seed)
+    elapsed = time.time() - started
+    matchups = len(profiles) * (len(profiles) - 1) // 2
+    print('{0} duels in {1:.1f} s ({2:.0f} per minute)\n'.format(
+        matchups * args.duels, elapsed,
+        matchups * args.duels / elapsed * 60))
+
+    names = [profile.cls_id for profile in profiles]
+    width = max(len(name) for name in names)
+    print(' ' * width, *(name[:6].rjust(6) for name in names))
+    for name, row in zip(names, matrix):
+        print(name.ljust(width), *('{0:6.3f}'.format(rate) for rate in row))
+
+    curves = damage_curves(profiles)
+    print('\nDamage per second at levels 0, 10, 20, ...')
+    for name, curve in zip(names, curves):
+        print(name.ljust(width),
+              *('{0:6.1f}'.format(value) for value in curve[::10]))
+
+    if args.output:
+        numpy.savez(
+            args.output, heroes=numpy.array(names), win_rates=matrix,
+            **{'damage_' + name: curve for name, curve in zip(names, curves)}
+        )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Vectorized spatial queries over the players, for area skills.
+
+A PlayerPositions snapshot keeps every player's origin, team and alive
+flag in NumPy arrays, so radius, cone and nearest-k queries are done
+with a few array operations instead of a Python loop over the players.
+Skills get the current tick's snapshot from
+herowars.player.get_positions():
+
+    positions = get_positions()
+    for enemy in positions.within_radius(player, 300,
+                                         not_team=player.team):
+        ...
+
+Run this module to compare it with the naive loop:
+
+    python spatial.py
+"""
+
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python
+import math
+import random
+import timeit
+
+# NumPy
+import numpy
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'PlayerPositions',
+)
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def _to_array(vector):
+    """Converts a Vector or a sequence of three numbers to an array."""
+
+    if hasattr(vector, 'x'):
+        return numpy.array((vector.x, vector.y, vector.z), dtype=float)
+    return numpy.asarray(vector, dtype=float)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class PlayerPositions(object):
+    """Snapshot of the players' positions.
+
+    Attributes:
+        players: List of the players, in the order of the arrays
+        origins: (n, 3) array of the players' origins
+        teams: Array of the players' team numbers
+        alive: Boolean array, True for living players
+    """
+
+    def __init__(self, players, origins, teams, alive):
+        """Initializes a new snapshot.
+
+        Args:
+            players: Players in the snapshot
+            origins: Players' origins as (x, y, z) sequences
+            teams: Players' team numbers
+            alive: Are the players alive
+        """
+
+        self.players = list(players)
+        self.origins = numpy.asarray(origins, dtype=float).reshape(-1, 3)
+        self.teams = numpy.asarray(teams, dtype=int)
+        self.alive = numpy.asarray(alive, dtype=bool)
+        self._indexes = {id(player): i for i, player in enumerate(players)}
+        self._masks = {}
+        self._pair_distances = None
+
+    @classmethod
+    def from_players(cls, players):
+        """Takes a snapshot of players.
+
+        Args:
+            players: Player entities to take the snapshot of
+
+        Returns:
+            New snapshot
+        """
+
+        players = list(players)
+        origins = []
+        for player in players:
+            origin = player.origin
+            origins.append((origin.x, origin.y, origin.z))
+        return cls(
+            players,
+            origins,
+            [player.team for player in players],
+            [not player.dead for player in players]
+        )
+
+    def __len__(self):
+        return len(self.players)
+
+    def _mask(self, alive, team, not_team, exclude):
+        """Gets the mask of the players passing the filters.
+
+        Masks of the alive and team filters are cached, since the
+        same few combinations are used by every skill.
+        """
+
+        key = (alive, team, not_team)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self.alive.copy() if alive \
+                else numpy.ones(len(self), bool)
+            if team is not None:
+                mask &= self.teams == team
+            if not_team is not None:
+                mask &= self.teams != not_team
+            self._masks[key] = mask
+        index = self._indexes.get(id(exclude))
+        if index is not None and mask[index]:
+            mask = mask.copy()
+            mask[index] = False
+        return mask
+
+    def _squared_distances(self, center):
+        """Gets the squared distances of the players from a point.
+
+        When the center is a player of the snapshot, the distances are
+        read from a matrix of all the players' distances, which is
+        computed once per snapshot.
+        """
+
+        index = self._indexes.get(id(center))
+        if index is not None:
+            if self._pair_distances is None:
+                offsets = self.origins[:, None, :] - self.origins[None, :, :]
+                self._pair_distances = numpy.einsum(
+                    'ijk,ijk->ij', offsets, offsets)
+            return self._pair_distances[index]
+        offsets = self.origins - _to_array(getattr(center, 'origin', center))
+        return numpy.einsum('ij,ij->i', offsets, offsets)
+
+    def _select(self, mask):
+        """Gets the players of a mask."""
+
+        players = self.players
+        return [players[i] for i in numpy.flatnonzero(mask).tolist()]
+
+    def within_radius(self, center, radius, alive=True, team=None,
+                      not_team=None, exclude=None):
+        """Gets the players within a sphere.
+
+        Args:
+            center: Center of the sphere, a point or a player
+                of the snapshot
+            radius: Radius of the sphere
+            alive: Only include living players
+            team: Only include players of this team
+            not_team: Exclude players of this team, e.g. own team
+            exclude: Player to exclude, e.g. the caster
+
+        Returns:
+            List of the players within the radius
+        """
+
+        mask = self._mask(alive, team, not_team, exclude)
+        return self._select(
+            mask & (self._squared_distances(center) <= radius * radius))
+
+    def within_cone(self, origin, direction, angle, radius, alive=True,
+                    team=None, not_team=None, exclude=None):
+        """Gets the players within a cone.
+
+        Args:
+            origin: Apex of the cone
+            direction: Direction the cone opens towards
+            angle: Half of the cone's opening angle in degrees
+            radius: Length of the cone
+            alive, team, not_team, exclude: See within_radius()
+
+        Returns:
+            List of the players within the cone
+        """
+
+        direction = _to_array(direction)
+        direction = direction / numpy.linalg.norm(direction)
+        offsets = self.origins - _to_array(origin)
+        distances = numpy.sqrt(numpy.einsum('ij,ij->i', offsets, offsets))
+        mask = self._mask(alive, team, not_team, exclude) \
+            & (distances <= radius)
+        # Players exactly at the apex are considered inside the cone
+        projections = offsets @ direction
+        mask &= (projections >= distances * math.cos(math.radians(angle))) \
+            | (distances == 0)
+        return self._select(mask)
+
+    def nearest(self, center, k, alive=True, team=None, not_team=None,
+                exclude=None):
+        """Gets the players closest to a point.
+
+        Args:
+            center: Point or player to measure the distances from
+            k: Maximum amount of players to get
+            alive, team, not_team, exclude: See within_radius()
+
+        Returns:
+            List of at most k players, closest first
+        """
+
+        candidates = numpy.flatnonzero(
+            self._mask(alive, team, not_team, exclude))
+        if not len(candidates) or k <= 0:
+            return []
+        distances = self._squared_distances(center)[candidates]
+        if k < len(candidates):
+            closest = numpy.argpartition(distances, k)[:k]
+        else:
+            closest = numpy.arange(len(candidates))
+        closest = closest[numpy.argsort(distances[closest])]
+        return [self.players[i] for i in candidates[closest]]
+
+
+# ======================================================================
+# >> BENCHMARK
+# ======================================================================
+
+def _naive_within_radius(players, center, radius, not_team):
+    """Radius query done with a loop, for comparison."""
+
+    result = []
+    cx, cy, cz = center
+    for player, (x, y, z), team, alive in players:
+        if not alive or team == not_team:
+            continue
+        if (x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2 <= radius * radius:
+            result.append(player)
+    return result
+
+
+def _benchmark(player_count=64, queries=500):
+    """Compares radius queries against the naive loop.
+
+    Half of the queries are centered at players, like AoE skills
+    around the attacker or the victim, and half at arbitrary points.
+    """
+
+    rows = [
+        (object(),
+         (random.uniform(-2000, 2000), random.uniform(-2000, 2000),
+          random.uniform(0, 300)),
+         random.choice((2, 3)), random.random() < 0.8)
+        for _ in range(player_count)
+    ]
+    players = [row[0] for row in rows]
+    centers = [
+        (random.uniform(-2000, 2000), random.uniform(-2000, 2000), 0)
+        for _ in range(player_count)
+    ]
+
+    def naive():
+        for i in range(queries):
+            if i % 2:
+                center = rows[i % player_count][1]
+            else:
+                center = centers[i % player_count]
+            _naive_within_radius(rows, center, 500, 2)
+
+    def vectorized():
+        positions = PlayerPositions(*zip(*rows))  # Once per tick
+        for i in range(queries):
+            if i % 2:
+                center = players[i % player_count]
+            else:
+                center = centers[i % player_count]
+            positions.within_radius(center, 500, not_team=2)
+
+    positions = PlayerPositions(*zip(*rows))
+    for player, center in zip(players, centers):
+        assert positions.within_radius(center, 500, not_team=2) == \
+            _naive_within_radius(rows, center, 500, 2)
+        assert positions.within_radius(player, 500, not_team=2) == \
+            _naive_within_radius(rows, rows[players.index(player)][1],
+                                 500, 2)
+    for name, function in (('naive', naive), ('vectorized', vectorized)):
+        seconds = min(timeit.repeat(function, number=10, repeat=5)) / 10
+        print('{0:>10}: {1:.2f} ms per tick ({2} players, {3} queries)'
+              .format(name, seconds * 1000, player_count, queries))
+
+
+if __name__ == '__main__':
+    _benchmark()
\ No newline at end of file
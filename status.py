@@ -0,0 +1,302 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.effects import EffectBatch
+
+from herowars.configs import status_interval
+
+# Python
+from heapq import heappop
+from heapq import heappush
+from itertools import count
+
+# Source.Python
+from engines.server import global_vars
+from entities.constants import MoveType
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'StatusEffect',
+    'Burn',
+    'Freeze',
+    'Push',
+    'StatusEngine',
+    'status_engine'
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class StatusEffect(object):
+    """Timed effect on a player, run by a StatusEngine.
+
+    A player has at most one effect of each class. Applying an effect
+    the player already has calls stack() on the existing effect, which
+    implements the effect's stacking and refresh rules.
+
+    Attributes:
+        player: Player the effect is on
+        expires_at: Game time the effect ends at
+        interval: Seconds between the effect's ticks, None for none
+        next_tick: Game time of the next tick, None for none
+        stacks: Amount of times the effect has been stacked
+    """
+
+    max_stacks = 1
+    tick_on_start = False  # First tick on the engine's next pass
+
+    def __init__(self, player, expires_at, interval=None):
+        """Initializes a new effect.
+
+        Args:
+            player: Player the effect is on
+            expires_at: Game time the effect ends at
+            interval: Seconds between the effect's ticks, None for none
+        """
+
+        self.player = player
+        self.expires_at = expires_at
+        self.interval = interval
+        self.next_tick = None
+        self.stacks = 1
+        self.removed = False
+        self._due = None
+
+    def stack(self, expires_at, **values):
+        """Applies the effect again, refreshing its duration.
+
+        Stacks are added up to max_stacks, and the effect lasts until
+        the later one of the two expirations.
+
+        Args:
+            expires_at: Game time the new application ends at
+            **values: Values of the new application
+        """
+
+        self.stacks = min(self.stacks + 1, self.max_stacks)
+        self.expires_at = max(self.expires_at, expires_at)
+
+    def start(self):
+        """Called when the effect is first applied."""
+
+    def tick(self, batch):
+        """Called every interval, adds the effect into a batch.
+
+        Args:
+            batch: EffectBatch resolved after every due effect has ticked
+        """
+
+    def end(self):
+        """Called when the effect expires or the player dies."""
+
+
+class Burn(StatusEffect):
+    """Deals damage every interval.
+
+    Stacks up to three times, each stack dealing the damage of the
+    strongest application. The damage is lethal, a burn killing the
+    player credits the kill to the attacker of the latest application.
+    """
+
+    max_stacks = 3
+
+    def __init__(self, player, expires_at, interval=1, damage=0,
+                 attacker=None):
+        super().__init__(player, expires_at, interval)
+        self.damage = damage
+        self.attacker = attacker
+
+    def stack(self, expires_at, damage=0, attacker=None, **values):
+        super().stack(expires_at)
+        self.damage = max(self.damage, damage)
+        if attacker is not None:
+            self.attacker = attacker
+
+    def tick(self, batch):
+        batch.damage(self.player, self.damage * self.stacks, self.attacker)
+
+
+class Freeze(StatusEffect):
+    """Prevents a player from moving.
+
+    Doesn't stack, applying it again only extends the duration.
+    """
+
+    def start(self):
+        self.player.move_type = MoveType.NONE
+
+    def end(self):
+        self.player.move_type = MoveType.WALK
+
+
+class Push(StatusEffect):
+    """Pushes a player with a velocity every interval.
+
+    The first push happens on the engine's next pass, so an effect
+    lasting less than an interval still pushes once. Applying it
+    again adds the new velocity to the push, up to max_stacks
+    velocities, after which it only refreshes the duration.
+    """
+
+    max_stacks = 10
+    tick_on_start = True
+
+    def __init__(self, player, expires_at, interval=0.1, vector=None):
+        super().__init__(player, expires_at, interval)
+        self.vector = vector
+
+    def stack(self, expires_at, vector=None, **values):
+        if self.stacks < self.max_stacks:
+            self.vector = self.vector + vector
+        super().stack(expires_at)
+
+    def tick(self, batch):
+        batch.knockback(self.player, self.vector)
+
+
+class StatusEngine(object):
+    """Runs every player's status effects from a single tick repeat.
+
+    Each effect is in one min-heap, keyed by the game time it's next
+    due at, either to tick or to expire. The engine's repeat pops the
+    due effects, lets them add their damage and pushes into a single
+    EffectBatch, and resolves the batch once, so any amount of active
+    effects costs one timer and one write per player property.
+
+    Refreshed effects are pushed into the heap again and their old
+    entries are skipped when popped, instead of searching the heap.
+    """
+
+    def __init__(self, interval=status_interval):
+        """Initializes a new engine.
+
+        Args:
+            interval: Seconds between the engine's passes
+        """
+
+        self.interval = interval
+        self._heap = []
+        self._counter = count()
+        self._effects = {}
+        self._tick_repeat = TickRepeat(self._tick)
+
+    def start(self):
+        """Starts running the effects."""
+
+        self._tick_repeat.start(self.interval, 0)
+
+    def stop(self):
+        """Stops running the effects, ending every active effect."""
+
+        self._tick_repeat.stop()
+        for player in list(self._effects):
+            self.clear(player)
+        self._heap.clear()
+
+    def apply(self, player, effect_cls, duration, **values):
+        """Applies an effect on a player for a duration.
+
+        Args:
+            player: Player to apply the effect on
+            effect_cls: StatusEffect subclass of the effect
+            duration: Seconds the effect lasts
+            **values: Arguments for the effect's constructor
+
+        Returns:
+            Player's effect of the class
+        """
+
+        expires_at = global_vars.current_time + duration
+        effects = self._effects.setdefault(player, {})
+        effect = effects.get(effect_cls)
+        if effect is None:
+            effect = effects[effect_cls] = effect_cls(
+                player, expires_at, **values)
+            if effect.tick_on_start:
+                effect.next_tick = global_vars.current_time
+            elif effect.interval is not None:
+                effect.next_tick = global_vars.current_time + effect.interval
+            effect.start()
+        else:
+            effect.stack(expires_at, **values)
+        self._schedule(effect)
+        return effect
+
+    def get(self, player, effect_cls):
+        """Gets a player's active effect of a class.
+
+        Returns:
+            The effect, None if the player doesn't have one
+        """
+
+        return self._effects.get(player, {}).get(effect_cls)
+
+    def clear(self, player, end=True):
+        """Removes every effect from a player, e.g. upon death.
+
+        Args:
+            player: Player whose effects to remove
+            end: Call the effects' end(), False if the player is gone
+        """
+
+        for effect in self._effects.pop(player, {}).values():
+            effect.removed = True
+            if end:
+                effect.end()
+
+    def _schedule(self, effect):
+        """Pushes an effect into the heap at its next due time."""
+
+        due = effect.expires_at
+        if effect.next_tick is not None and effect.next_tick < due:
+            due = effect.next_tick
+        if due != effect._due:
+            effect._due = due
+            heappush(self._heap, (due, next(self._counter), effect))
+
+    def _remove(self, effect):
+        """Removes an expired effect from its player."""
+
+        effect.removed = True
+        effects = self._effects.get(effect.player)
+        if effects is not None:
+            effects.pop(type(effect), None)
+            if not effects:
+                del self._effects[effect.player]
+        effect.end()
+
+    def _tick(self):
+        """Ticks and expires the due effects, resolving them at once."""
+
+        now = global_vars.current_time
+        heap = self._heap
+        batch = EffectBatch()
+        while heap and heap[0][0] <= now:
+            due, _, effect = heappop(heap)
+            if effect.removed or due != effect._due:
+                continue  # Refreshed or removed since pushed
+            effect._due = None
+            if effect.next_tick is not None and effect.next_tick <= now:
+                effect.tick(batch)
+                effect.next_tick += effect.interval
+            if effect.expires_at <= now:
+                self._remove(effect)
+            else:
+                self._schedule(effect)
+        batch.resolve()
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+status_engine = StatusEngine()
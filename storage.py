@@ -0,0 +1,332 @@
+"""SQL operations on the Hero Wars tables.
+
+The functions work on plain rows and an open cursor, without
+Source.Python or the entity classes, so they are shared by
+herowars.database and the standalone storage service.
+"""
+
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python
+import time
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'create_tables',
+    'write_player',
+    'write_hero',
+    'read_player',
+    'read_hero',
+    'read_player_stats',
+    'add_hero_stats',
+    'append_gold',
+    'compact_gold_ledger'
+)
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def create_tables(cursor):
+    """Creates the HW tables if they don't exist.
+
+    Args:
+        cursor: Cursor of an open connection
+    """
+
+    # Only affects new databases, allows pruning to shrink the file
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS players (
+        steamid TEXT PRIMARY KEY,
+        gold INTEGER,
+        hero_cls_id TEXT,
+        last_seen INTEGER
+    )""")
+    cursor.execute("PRAGMA table_info(players)")
+    if 'last_seen' not in (column[1] for column in cursor.fetchall()):
+        cursor.execute("ALTER TABLE players ADD COLUMN last_seen INTEGER")
+        cursor.execute(
+            "UPDATE players SET last_seen=?", (int(time.time()), )
+        )
+    cursor.execute("""CREATE TABLE IF NOT EXISTS heroes (
+        steamid TEXT,
+        cls_id TEXT,
+        level INTEGER,
+        exp INTEGER,
+        PRIMARY KEY (steamid, cls_id)
+    )""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS gold_ledger (
+        id INTEGER PRIMARY KEY,
+        steamid TEXT,
+        amount INTEGER,
+        reason TEXT,
+        created INTEGER
+    )""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS gold_ledger_steamid
+        ON gold_ledger (steamid)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS skills (
+        steamid TEXT,
+        hero_cls_id TEXT,
+        cls_id TEXT,
+        level INTEGER,
+        PRIMARY KEY (steamid, hero_cls_id, cls_id)
+    )""")
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        ('player_stats', )
+    )
+    stats_exist = cursor.fetchone() is not None
+    cursor.execute("""CREATE TABLE IF NOT EXISTS player_stats (
+        steamid TEXT PRIMARY KEY,
+        total_level INTEGER
+    )""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS player_stats_total_level
+        ON player_stats (total_level)""")
+    if not stats_exist:  # One time aggregation of existing heroes
+        cursor.execute(
+            "INSERT INTO player_stats "
+            "SELECT steamid, SUM(level) FROM heroes GROUP BY steamid"
+        )
+    cursor.execute("""CREATE TABLE IF NOT EXISTS hero_stats (
+        steamid TEXT,
+        cls_id TEXT,
+        kills INTEGER,
+        deaths INTEGER,
+        assists INTEGER,
+        headshots INTEGER,
+        damage INTEGER,
+        PRIMARY KEY (steamid, cls_id)
+    )""")
+
+
+def write_player(cursor, steamid, hero_cls_id, last_seen=None):
+    """Writes a player's row.
+
+    The player's gold is left untouched, it only changes through
+    the gold ledger (see append_gold()).
+
+    Args:
+        cursor: Cursor of an open connection
+        steamid: Steamid of the player
+        hero_cls_id: Class id of the player's current hero
+        last_seen: Timestamp of the save, current time by default
+    """
+
+    last_seen = last_seen or int(time.time())
+    cursor.execute(
+        "INSERT OR IGNORE INTO players VALUES (?, 0, ?, ?)",
+        (steamid, hero_cls_id, last_seen)
+    )
+    cursor.execute(
+        "UPDATE players SET hero_cls_id=?, last_seen=? WHERE steamid=?",
+        (hero_cls_id, last_seen, steamid)
+    )
+
+
+def write_hero(cursor, steamid, cls_id, level, exp, skills):
+    """Writes a hero's row and its skills' rows.
+
+    Also shifts the owner's total level by the hero's level change.
+
+    Args:
+        cursor: Cursor of an open connection
+        steamid: Steamid of the hero's owner
+        cls_id: Class id of the hero
+        level: Hero's level
+        exp: Hero's experience points
+        skills: Iterable of (cls_id, level) pairs of the hero's skills
+    """
+
+    cursor.execute(
+        "SELECT level FROM heroes WHERE steamid=? AND cls_id=?",
+        (steamid, cls_id)
+    )
+    previous_level = (cursor.fetchone() or (0, ))[0]
+    cursor.execute(
+        "INSERT OR REPLACE INTO heroes VALUES (?, ?, ?, ?)",
+        (steamid, cls_id, level, exp)
+    )
+    _shift_total_level(cursor, steamid, level - previous_level)
+    cursor.executemany(
+        "INSERT OR REPLACE INTO skills VALUES (?, ?, ?, ?)",
+        ((steamid, cls_id, skill_cls_id, skill_level)
+         for skill_cls_id, skill_level in skills)
+    )
+
+
+def _shift_total_level(cursor, steamid, shift):
+    """Shifts a player's total level in the player_stats table.
+
+    Args:
+        cursor: Cursor of an open connection
+        steamid: Steamid of the player
+        shift: Change in the player's total level, can be negative
+    """
+
+    cursor.execute(
+        "INSERT OR IGNORE INTO player_stats VALUES (?, 0)", (steamid, )
+    )
+    if shift:
+        cursor.execute(
+            "UPDATE player_stats SET total_level=total_level+? "
+            "WHERE steamid=?",
+            (shift, steamid)
+        )
+
+
+def add_hero_stats(cursor, rows):
+    """Adds combat statistics onto the heroes' stored statistics.
+
+    Args:
+        cursor: Cursor of an open connection
+        rows: Iterable of (steamid, cls_id, kills, deaths, assists,
+            headshots, damage) tuples of amounts to add
+    """
+
+    rows = list(rows)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO hero_stats VALUES (?, ?, 0, 0, 0, 0, 0)",
+        ((steamid, cls_id) for steamid, cls_id, *_ in rows)
+    )
+    cursor.executemany(
+        "UPDATE hero_stats SET kills=kills+?, deaths=deaths+?, "
+        "assists=assists+?, headshots=headshots+?, damage=damage+? "
+        "WHERE steamid=? AND cls_id=?",
+        ((*counters, steamid, cls_id) for steamid, cls_id, *counters in rows)
+    )
+
+
+def append_gold(cursor, steamid, amount, reason=None, created=None):
+    """Appends a change of a player's gold into the gold ledger.
+
+    Args:
+        cursor: Cursor of an open connection
+        steamid: Steamid of the player
+        amount: Amount of gold gained, negative for spent gold
+        reason: Description of the change, e.g. a hero's class id
+        created: Timestamp of the change, current time by default
+    """
+
+    cursor.execute(
+        "INSERT INTO gold_ledger (steamid, amount, reason, created) "
+        "VALUES (?, ?, ?, ?)",
+        (steamid, amount, reason, created or int(time.time()))
+    )
+
+
+def compact_gold_ledger(cursor):
+    """Folds the gold ledger's entries into the players' gold.
+
+    Entries appended while compacting are left for the next time,
+    and the players' totals (gold plus uncompacted entries) stay
+    the same throughout.
+
+    Args:
+        cursor: Cursor of an open connection
+
+    Returns:
+        Amount of entries folded
+    """
+
+    cursor.execute("SELECT MAX(id) FROM gold_ledger")
+    last_id = cursor.fetchone()[0]
+    if last_id is None:
+        return 0
+    cursor.execute(
+        "INSERT OR IGNORE INTO players "
+        "SELECT steamid, 0, NULL, MAX(created) FROM gold_ledger "
+        "WHERE id<=? GROUP BY steamid",
+        (last_id, )
+    )
+    cursor.execute(
+        "UPDATE players SET gold=gold+(SELECT SUM(amount) FROM gold_ledger "
+        "WHERE gold_ledger.steamid=players.steamid AND id<=?) "
+        "WHERE steamid IN (SELECT steamid FROM gold_ledger WHERE id<=?)",
+        (last_id, last_id)
+    )
+    cursor.execute("DELETE FROM gold_ledger WHERE id<=?", (last_id, ))
+    return cursor.rowcount
+
+
+def read_player(cursor, steamid):
+    """Reads all of a player's rows.
+
+    Args:
+        cursor: Cursor of an open connection
+        steamid: Steamid of the player
+
+    The player's gold includes the ledger's uncompacted entries.
+    Both are read in one statement, so a compaction committing
+    in between can't make the entries count twice or not at all.
+
+    Returns:
+        Tuple of gold, current hero's class id, list of
+        (cls_id, level, exp) hero rows and list of
+        (hero_cls_id, cls_id, level) skill rows
+    """
+
+    cursor.execute(
+        """SELECT
+            COALESCE((SELECT gold FROM players WHERE steamid=?), 0)
+            + COALESCE(
+                (SELECT SUM(amount) FROM gold_ledger WHERE steamid=?), 0),
+            (SELECT hero_cls_id FROM players WHERE steamid=?)""",
+        (steamid, steamid, steamid)
+    )
+    gold, hero_cls_id = cursor.fetchone()
+    cursor.execute(
+        "SELECT cls_id, level, exp FROM heroes WHERE steamid=?",
+        (steamid, )
+    )
+    heroes = cursor.fetchall()
+    cursor.execute(
+        "SELECT hero_cls_id, cls_id, level FROM skills WHERE steamid=?",
+        (steamid, )
+    )
+    skills = cursor.fetchall()
+    return gold, hero_cls_id, heroes, skills
+
+
+def read_hero(cursor, steamid, cls_id):
+    """Reads a hero's rows.
+
+    Args:
+        cursor: Cursor of an open connection
+        steamid: Steamid of the hero's owner
+        cls_id: Class id of the hero
+
+    Returns:
+        Tuple of level, exp and list of (cls_id, level) skill rows
+    """
+
+    cursor.execute(
+        "SELECT level, exp FROM heroes WHERE steamid=? AND cls_id=?",
+        (steamid, cls_id)
+    )
+    level, exp = cursor.fetchone() or (0, 0)
+    cursor.execute(
+        "SELECT cls_id, level FROM skills WHERE steamid=? AND hero_cls_id=?",
+        (steamid, cls_id)
+    )
+    return level, exp, cursor.fetchall()
+
+
+def read_player_stats(cursor):
+    """Reads every player's total level.
+
+    Args:
+        cursor: Cursor of an open connection
+
+    Returns:
+        List of (steamid, total_level) tuples
+    """
+
+    cursor.execute("SELECT steamid, total_level FROM player_stats")
+    return cursor.fetchall()
\ No newline at end of file
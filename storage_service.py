@@ -0,0 +1,588 @@
+"""Shared storage service for several Hero Wars servers.
+
+The service owns the Hero Wars database and serves every game server
+on the machine over a Unix socket, so the servers no longer compete
+for SQLite's write lock. Writes from all the servers are batched into
+a single transaction, and after each commit the other servers are
+told which players' data changed so they can refresh their copies.
+
+Start it before the game servers and point configs.storage_socket to
+the same socket path:
+
+    python -m herowars.storage_service herowars.db /tmp/herowars.sock
+
+The protocol is one JSON object per line. Requests look like
+{"id": 1, "op": "read_player", "args": ["STEAM_0:1:2"]}, reads are
+answered with {"id": 1, "result": ...} or {"id": 1, "error": "..."}.
+Writes carry a sequence number instead of an id, {"seq": 1, ...},
+and once they've been committed the service acknowledges them with
+{"ack": 1}, covering the client's writes up to that number.
+Invalidations are pushed to the clients as
+{"invalidate": "STEAM_0:1:2"}.
+"""
+
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.storage import create_tables
+from herowars.storage import write_player
+from herowars.storage import write_hero
+from herowars.storage import read_player
+from herowars.storage import read_hero
+from herowars.storage import read_player_stats
+from herowars.storage import add_hero_stats
+from herowars.storage import append_gold
+from herowars.storage import compact_gold_ledger
+
+# Python
+import argparse
+from collections import deque
+import inspect
+import json
+import os
+import selectors
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'StorageError',
+    'StorageUnavailableError',
+    'StorageServer',
+    'StorageClient'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Operations which are batched and never answered
+_WRITES = {
+    'write_player': write_player,
+    'write_hero': write_hero,
+    'add_hero_stats': add_hero_stats,
+    'append_gold': append_gold,
+    'compact_gold_ledger': compact_gold_ledger
+}
+
+# Writes of a player's data, other servers' copies get invalidated
+_PLAYER_WRITES = ('write_player', 'write_hero', 'append_gold')
+
+# Operations answered right away, after the pending writes
+_READS = {
+    'create_tables': create_tables,
+    'read_player': read_player,
+    'read_hero': read_hero,
+    'read_player_stats': read_player_stats
+}
+
+# Signatures of the operations, for checking requests' arguments
+_SIGNATURES = {
+    op: inspect.signature(function)
+    for op, function in list(_WRITES.items()) + list(_READS.items())
+}
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class StorageError(Exception):
+    """Raised when the storage service fails to answer a request."""
+
+
+class StorageUnavailableError(StorageError):
+    """Raised when the storage service can't be reached in time."""
+
+
+class _Connection(object):
+    """A game server connected to the storage service."""
+
+    def __init__(self, sock):
+        self.socket = sock
+        self.buffer = b''
+
+    def send(self, message):
+        """Sends a message to the game server."""
+
+        self.socket.sendall(json.dumps(message).encode() + b'\n')
+
+
+class StorageServer(object):
+    """Storage service owning the database.
+
+    Runs a single threaded select loop, so the database is only ever
+    touched by one connection. Pending writes are committed in one
+    transaction once flush_interval has passed since the first of them
+    or max_pending writes have piled up, and always before a read so
+    every read sees all the writes received before it.
+    """
+
+    def __init__(self, database_file, socket_path, flush_interval=0.05,
+                 max_pending=1000):
+        """Initializes a new storage service.
+
+        Args:
+            database_file: Path to the database file
+            socket_path: Path of the Unix socket to listen to
+            flush_interval: Seconds writes may wait for a commit
+            max_pending: Writes that trigger a commit right away
+        """
+
+        self.database_file = database_file
+        self.socket_path = socket_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.running = False
+        self._connection = None
+        self._selector = selectors.DefaultSelector()
+        self._clients = []
+        self._pending = []
+        self._deadline = None
+
+    def serve_forever(self):
+        """Serves the game servers until stop() is called."""
+
+        self._connection = sqlite3.connect(self.database_file)
+        with self._connection:
+            create_tables(self._connection.cursor())
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen()
+        self._selector.register(listener, selectors.EVENT_READ, self._accept)
+        self.running = True
+        try:
+            while self.running:
+                timeout = None
+                if self._deadline is not None:
+                    timeout = max(0, self._deadline - time.time())
+                for key, _ in self._selector.select(timeout):
+                    key.data(key.fileobj)
+                if self._deadline is not None \
+                        and time.time() >= self._deadline:
+                    self._flush()
+        finally:
+            self._flush()
+            for client in list(self._clients):
+                self._drop(client)
+            self._selector.close()
+            listener.close()
+            os.remove(self.socket_path)
+            self._connection.close()
+
+    def stop(self):
+        """Stops serving after the current loop."""
+
+        self.running = False
+
+    def _accept(self, listener):
+        """Accepts a new game server."""
+
+        sock, _ = listener.accept()
+        client = _Connection(sock)
+        self._clients.append(client)
+        self._selector.register(
+            sock, selectors.EVENT_READ, lambda sock: self._read(client))
+
+    def _drop(self, client):
+        """Disconnects a game server."""
+
+        if client not in self._clients:
+            return  # Already dropped
+        self._selector.unregister(client.socket)
+        client.socket.close()
+        self._clients.remove(client)
+
+    def _read(self, client):
+        """Handles the complete requests received from a game server.
+
+        A game server sending a malformed request is dropped, the
+        other game servers are served as usual.
+        """
+
+        try:
+            data = client.socket.recv(65536)
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(client)
+            return
+        *lines, client.buffer = (client.buffer + data).split(b'\n')
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode())
+            except ValueError as error:
+                print('Dropped a client for a bad request: {0!r}'.format(
+                    error), file=sys.stderr)
+                self._drop(client)
+                return
+            self._handle(client, request)
+            if client not in self._clients:
+                return  # Dropped while answering
+
+    def _handle(self, client, request):
+        """Queues a write or answers a read.
+
+        A request with an unknown operation or the wrong arguments
+        is rejected to its client only.
+        """
+
+        try:
+            op, args = _parse_request(request)
+        except ValueError as error:
+            self._reject(client, request, error)
+            return
+        if op in _WRITES:
+            self._pending.append((client, op, args, request.get('seq')))
+            if self._deadline is None:
+                self._deadline = time.time() + self.flush_interval
+            if len(self._pending) >= self.max_pending:
+                self._flush()
+            return
+        self._flush()
+        try:
+            with self._connection:
+                result = _READS[op](self._connection.cursor(), *args)
+            response = {'id': request['id'], 'result': result}
+        except Exception as error:
+            response = {'id': request['id'], 'error': repr(error)}
+        self._answer(client, response)
+
+    def _answer(self, client, response):
+        """Sends a response to a client, dropping it if it's gone."""
+
+        try:
+            client.send(response)
+        except OSError:
+            self._drop(client)
+
+    def _reject(self, client, request, error):
+        """Tells a client its request was rejected."""
+
+        print('Rejected a request: {0}'.format(error), file=sys.stderr)
+        if isinstance(request, dict) and 'id' in request:
+            self._answer(client, {'id': request['id'], 'error': str(error)})
+
+    def _flush(self):
+        """Commits the pending writes and sends the invalidations.
+
+        Each write runs under its own savepoint, so a failing write
+        is rolled back and logged alone, and the rest of the batch
+        is still committed. The writes' clients are acknowledged
+        after the commit, and if the commit fails, the writes are
+        kept pending for the next flush.
+        """
+
+        pending, self._pending = self._pending, []
+        self._deadline = None
+        if not pending:
+            return
+        cursor = self._connection.cursor()
+        try:
+            with self._connection:
+                cursor.execute("BEGIN")
+                for client, op, args, seq in pending:
+                    cursor.execute("SAVEPOINT write")
+                    try:
+                        _WRITES[op](cursor, *args)
+                    except Exception as error:
+                        cursor.execute("ROLLBACK TO write")
+                        print('Dropped {0}{1}: {2!r}'.format(op, args, error),
+                              file=sys.stderr)
+                    cursor.execute("RELEASE write")
+        except sqlite3.Error as error:
+            print('Failed to commit {0} writes: {1}'.format(
+                len(pending), error), file=sys.stderr)
+            self._pending[:0] = pending
+            self._deadline = time.time() + self.flush_interval
+            return
+        acks = {}
+        for client, op, args, seq in pending:
+            if seq is not None:
+                acks[client] = max(seq, acks.get(client, seq))
+        for client, seq in acks.items():
+            if client in self._clients:
+                self._answer(client, {'ack': seq})
+        writers = {}
+        for client, op, args, seq in pending:
+            if op in _PLAYER_WRITES:
+                writers.setdefault(args[0], set()).add(client)  # Steamid
+        for client in list(self._clients):
+            for steamid, steamid_writers in writers.items():
+                if client not in steamid_writers:
+                    try:
+                        client.send({'invalidate': steamid})
+                    except OSError:
+                        self._drop(client)
+                        break
+
+
+class StorageClient(object):
+    """Connection from a game server to the storage service.
+
+    Writes are sent without waiting for an answer, but are kept
+    until the service acknowledges their commit, so the ones a lost
+    service never committed can be taken with take_unacknowledged()
+    and written elsewhere. A write committed right before the service
+    was lost may still be unacknowledged, so it can end up written
+    twice.
+
+    Reads block the calling thread until the service answers them,
+    for at most timeout seconds. The service answers a read right
+    after committing its pending writes, normally in milliseconds.
+    A reader thread receives the answers and acknowledgements and
+    collects the invalidations, which the game thread picks up with
+    pop_invalidations().
+    """
+
+    def __init__(self, socket_path, timeout=1.0):
+        """Connects to the storage service.
+
+        Args:
+            socket_path: Path of the service's Unix socket
+            timeout: Seconds to wait for an answer to a read
+
+        Raises:
+            OSError: If the service can't be connected to
+        """
+
+        self.timeout = timeout
+        self.connected = True
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._next_seq = 0
+        self._unacked = {}  # seq: (op, args)
+        self._unacked_lock = threading.Lock()  # Never waits for _lock
+        self._waiting = {}
+        self._results = {}
+        self._invalidations = deque()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def _send(self, message, write=False):
+        """Sends a request to the service.
+
+        Args:
+            message: Request to send
+            write: Number the request and keep it until acknowledged
+
+        Raises:
+            StorageUnavailableError: If the connection has been lost
+        """
+
+        try:
+            with self._lock:
+                if not self.connected:
+                    raise OSError('Not connected.')
+                if write:
+                    self._next_seq += 1
+                    message['seq'] = self._next_seq
+                    with self._unacked_lock:
+                        self._unacked[message['seq']] = (
+                            message['op'], message['args'])
+                try:
+                    self._socket.sendall(json.dumps(message).encode() + b'\n')
+                except OSError:
+                    if write:
+                        with self._unacked_lock:
+                            del self._unacked[message['seq']]
+                    raise
+        except OSError as error:
+            self.close()
+            raise StorageUnavailableError(
+                'Lost the storage service: {0}'.format(error))
+
+    def send(self, op, *args):
+        """Sends a write to the service without waiting.
+
+        Args:
+            op: Name of the write operation
+            *args: Arguments for the operation, steamid first
+
+        Raises:
+            StorageUnavailableError: If the connection has been lost,
+                in which case the write wasn't sent
+        """
+
+        self._send({'op': op, 'args': args}, True)
+
+    def call(self, op, *args):
+        """Sends a read to the service and waits for the result.
+
+        Args:
+            op: Name of the read operation
+            *args: Arguments for the operation
+
+        Returns:
+            Result of the operation
+
+        Raises:
+            StorageError: If the service fails to run the operation
+            StorageUnavailableError: If the connection has been lost
+                or the service doesn't answer in time, in which case
+                the client is closed
+        """
+
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+        answered = self._waiting[request_id] = threading.Event()
+        self._send({'id': request_id, 'op': op, 'args': args})
+        if not answered.wait(self.timeout):
+            self._waiting.pop(request_id, None)
+            self.close()  # A late answer would belong to nobody
+            raise StorageUnavailableError(
+                'No answer to {0} from the storage.'.format(op))
+        response = self._results.pop(request_id, None)
+        if response is None:
+            raise StorageUnavailableError(
+                'Lost the storage service during {0}.'.format(op))
+        if 'error' in response:
+            raise StorageError(response['error'])
+        return response['result']
+
+    def pop_invalidations(self):
+        """Gets the steamids invalidated since the last call.
+
+        Returns:
+            List of steamids whose data was changed by other servers
+        """
+
+        steamids = []
+        while self._invalidations:
+            steamids.append(self._invalidations.popleft())
+        return steamids
+
+    def take_unacknowledged(self):
+        """Takes the writes the service hasn't acknowledged.
+
+        Meant for a closed client, whose writes won't be
+        acknowledged anymore.
+
+        Returns:
+            List of (op, args) tuples in the order they were sent
+        """
+
+        with self._unacked_lock:
+            writes = list(self._unacked.values())
+            self._unacked.clear()
+        return writes
+
+    def close(self):
+        """Disconnects from the service."""
+
+        self.connected = False
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+
+    def _acknowledge(self, seq):
+        """Forgets the writes the service has committed."""
+
+        with self._unacked_lock:
+            for acked in [key for key in self._unacked if key <= seq]:
+                del self._unacked[acked]
+
+    def _read_loop(self):
+        """Receives answers and invalidations from the service.
+
+        When the connection ends, the client is marked disconnected
+        and the waiting reads are woken up to fail right away.
+        """
+
+        try:
+            with self._socket.makefile('rb') as stream:
+                for line in stream:
+                    message = json.loads(line.decode())
+                    if 'invalidate' in message:
+                        self._invalidations.append(message['invalidate'])
+                        continue
+                    if 'ack' in message:
+                        self._acknowledge(message['ack'])
+                        continue
+                    answered = self._waiting.pop(message['id'], None)
+                    if answered:
+                        self._results[message['id']] = message
+                        answered.set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.connected = False
+            for request_id in list(self._waiting):
+                answered = self._waiting.pop(request_id, None)
+                if answered:
+                    answered.set()
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def _parse_request(request):
+    """Checks a request's operation and arguments.
+
+    Args:
+        request: Decoded request
+
+    Returns:
+        Tuple of the operation's name and the arguments
+
+    Raises:
+        ValueError: If the request can't be run
+    """
+
+    if not isinstance(request, dict):
+        raise ValueError('Request is not an object.')
+    op = request.get('op')
+    args = request.get('args', [])
+    if op not in _SIGNATURES:
+        raise ValueError('Unknown operation {0!r}.'.format(op))
+    if op in _READS and 'id' not in request:
+        raise ValueError('Read {0} has no id.'.format(op))
+    if not isinstance(args, list):
+        raise ValueError('Arguments of {0} are not a list.'.format(op))
+    try:
+        _SIGNATURES[op].bind(None, *args)  # None for the cursor
+    except TypeError as error:
+        raise ValueError('Bad arguments for {0}: {1}'.format(op, error))
+    if op in _PLAYER_WRITES and not isinstance(args[0], str):
+        raise ValueError('Steamid of {0} is not a string.'.format(op))
+    return op, args
+
+
+def main(argv=None):
+    """Runs the storage service from the command line."""
+
+    parser = argparse.ArgumentParser(
+        description='Share one Hero Wars database between servers.')
+    parser.add_argument('database', help='Path to the database file')
+    parser.add_argument('socket', help='Path of the Unix socket')
+    parser.add_argument('--flush-interval', type=float, default=0.05)
+    args = parser.parse_args(argv)
+    server = StorageServer(args.database, args.socket, args.flush_interval)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
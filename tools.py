@@ -5,6 +5,7 @@
 # Python
 from random import randint
 from functools import wraps, WRAPPER_ASSIGNMENTS
+from weakref import ref, WeakMethod
 
 # Source.Python
 from listeners.tick.repeat import TickRepeat
@@ -27,6 +28,133 @@ class classproperty(object):
         return self.getter(owner)
 
 
+class _StrongRef(object):
+    """Strong reference with the interface of a weak reference."""
+
+    __slots__ = ('_listener', )
+
+    def __init__(self, listener):
+        self._listener = listener
+
+    def __call__(self):
+        return self._listener
+
+
+class Event(object):
+    """Notifies listeners of a change, e.g. of a player's gold.
+
+    Listeners are weakly referenced by default, so listening doesn't
+    keep objects such as menus alive; dead listeners are dropped
+    automatically. The listeners are kept in a tuple that's replaced
+    whenever a listener is added or removed, so firing only iterates
+    the tuple, and listeners may be added or removed while firing.
+
+    A deferred event doesn't notify right away. Instead, the changes
+    fired for the same sender are merged until the next tick, and the
+    listeners are notified once. Each keyword argument is merged on
+    its own: previous_* values keep the first value, *_change values
+    are deltas and get summed, and the other values keep the latest:
+
+        e_gold_change.fire(sender=client, new_gold=5, previous_gold=0)
+        e_gold_change.fire(sender=client, new_gold=8, previous_gold=5)
+        # Next tick: listener(sender=client, new_gold=8, previous_gold=0)
+
+    Events with other kinds of values can pass their own merge
+    function instead.
+    """
+
+    def __init__(self, deferred=False, merge=None):
+        """Initializes a new event.
+
+        Args:
+            deferred: Merge each sender's changes until the next tick
+            merge: Function called with the pending and the new keyword
+                arguments, updating the pending ones in place, None for
+                the default rules
+        """
+
+        self.deferred = deferred
+        self.merge = merge or _merge_changes
+        self._listeners = ()
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._listeners)
+
+    def listen(self, listener, weak=True):
+        """Adds a listener to the event.
+
+        Args:
+            listener: Callable to call with the fired keyword arguments
+            weak: Reference the listener weakly, pass False for lambdas
+                and other listeners nothing else references
+        """
+
+        if not weak:
+            reference = _StrongRef(listener)
+        elif hasattr(listener, '__self__'):
+            reference = WeakMethod(listener, self._drop)
+        else:
+            reference = ref(listener, self._drop)
+        self._listeners += (reference, )
+
+    def unlisten(self, listener):
+        """Removes a listener from the event.
+
+        Args:
+            listener: Listener to remove
+        """
+
+        self._listeners = tuple(
+            reference for reference in self._listeners
+            if reference() != listener
+        )
+
+    def _drop(self, reference):
+        """Removes a dead listener's reference."""
+
+        self._listeners = tuple(
+            other for other in self._listeners if other is not reference)
+
+    def fire(self, sender=None, **kwargs):
+        """Notifies the listeners.
+
+        Args:
+            sender: Object whose change is notified
+            **kwargs: Details of the change
+        """
+
+        if self.deferred:
+            self._defer(sender, kwargs)
+            return
+        for reference in self._listeners:
+            listener = reference()
+            if listener is not None:
+                listener(sender=sender, **kwargs)
+
+    def _defer(self, sender, kwargs):
+        """Merges a change into the sender's pending notification."""
+
+        pending = self._pending.get(id(sender))
+        if pending is None:
+            self._pending[id(sender)] = (sender, kwargs)
+            if not _deferred_events:
+                _deferred_repeat.start(0, 1)
+            _deferred_events.add(self)
+            return
+        self.merge(pending[1], kwargs)
+
+    def flush(self):
+        """Notifies the listeners of the pending changes right away."""
+
+        pending, self._pending = self._pending, {}
+        for sender, kwargs in pending.values():
+            for reference in self._listeners:
+                listener = reference()
+                if listener is not None:
+                    listener(sender=sender, **kwargs)
+
+
 class _Cooldown(object):
     def __init__(self, max_cooldown):
         self.max_cooldown = max_cooldown
@@ -47,6 +175,22 @@ class _Cooldown(object):
 # >> FUNCTIONS
 # ======================================================================
 
+def _merge_changes(merged, kwargs):
+    """Merges a deferred Event's new keyword arguments into the pending.
+
+    Keeps the first previous_* values, sums the *_change deltas
+    and keeps the latest of the other values.
+    """
+
+    for name, value in kwargs.items():
+        if name not in merged:
+            merged[name] = value
+        elif name.endswith('_change'):
+            merged[name] += value
+        elif not name.startswith('previous_'):
+            merged[name] = value
+
+
 def find_element(iterable, attr_name, attr_value):
     """Finds an element with matching attribute."""
 
@@ -107,6 +251,7 @@ def chance(percentage):
             if randint(0, 100) <= percentage:
                 return method(self, game_event)
             return 1  # Failed to execute
+        _add_gate(method_wrapper, method, 'chance', percentage)
         return method_wrapper
     return method_decorator
 
@@ -131,10 +276,39 @@ def chancef(fn):
             if randint(0, 100) <= fn(self, game_event):
                 return method(self, game_event)
             return 2  # Failed to execute
+        _add_gate(method_wrapper, method, 'chancef', fn)
         return method_wrapper
     return method_decorator
 
 
+def _flush_deferred_events():
+    """Notifies the deferred events' listeners of the merged changes."""
+
+    events = list(_deferred_events)
+    _deferred_events.clear()
+    for event in events:
+        event.flush()
+
+
+def _add_gate(method_wrapper, method, kind, value):
+    """Records a decorator's gate on the decorated method.
+
+    The wrappers share the decorated method's __dict__, so stacked
+    decorators all append into the same gates list, innermost first,
+    and undecorated stays the original method. Offline tools like
+    the balance simulator read these instead of running the wrappers.
+
+    Args:
+        method_wrapper: Wrapper returned by the decorator
+        method: Method the decorator was applied to
+        kind: 'chance', 'chancef', 'cooldown' or 'cooldownf'
+        value: The decorator's percentage, time or function
+    """
+
+    method_wrapper.__dict__.setdefault('undecorated', method)
+    method_wrapper.__dict__.setdefault('gates', []).append((kind, value))
+
+
 def _empty(*args, **kwargs):
     """Empty function, does nothing."""
 
@@ -162,6 +336,7 @@ def cooldown(time):
                 return method(self, game_event)
             return 3 # Failed to execute
         method_wrapper.cooldown = TickRepeat(_empty)
+        _add_gate(method_wrapper, method, 'cooldown', time)
         return method_wrapper
     return method_decorator
 
@@ -188,5 +363,15 @@ def cooldownf(fn):
                 return method(self, game_event)
             return 4  # Failed to execute
         method_wrapper.cooldown = TickRepeat(_empty)
+        _add_gate(method_wrapper, method, 'cooldownf', fn)
         return method_wrapper
-    return method_decorator
\ No newline at end of file
+    return method_decorator
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Deferred events with pending changes, flushed on the next tick
+_deferred_events = set()
+_deferred_repeat = TickRepeat(_flush_deferred_events)
\ No newline at end of file
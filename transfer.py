@@ -0,0 +1,401 @@
+"""Bulk import and export of Hero Wars player data.
+
+Streams the players, heroes and skills tables of a Hero Wars database
+into JSON Lines or CSV files and imports them back with batched
+upserts. Memory use stays constant regardless of the table sizes, and
+interrupted imports can be resumed from their checkpoint file.
+
+This tool doesn't need Source.Python and can be run on its own:
+
+    python transfer.py export herowars.db dump/ --format jsonl
+    python transfer.py import herowars.db dump/ --checkpoint dump/.ckpt
+
+Imports expect the Hero Wars tables to exist, so the target database
+should have been set up by the plugin first.
+"""
+
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'TABLES',
+    'export_table',
+    'import_table',
+    'export_database',
+    'import_database'
+)
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Columns and their types of the tables created by setup_database()
+TABLES = (
+    ('players', (('steamid', str), ('gold', int), ('hero_cls_id', str),
+                 ('last_seen', int))),
+    ('heroes', (('steamid', str), ('cls_id', str), ('level', int),
+                ('exp', int))),
+    ('skills', (('steamid', str), ('hero_cls_id', str), ('cls_id', str),
+                ('level', int)))
+)
+
+FORMATS = ('jsonl', 'csv')
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class _Checkpoint(object):
+    """Import progress stored in a small JSON file.
+
+    Keeps track of how many rows of each table have been committed
+    and the byte offset in the table's file after them, so an
+    interrupted import can seek to where it left off.
+    """
+
+    def __init__(self, path=None):
+        """Loads an existing checkpoint if there's one.
+
+        Args:
+            path: Path to the checkpoint file, None to disable
+        """
+
+        self.path = path
+        self.rows = {}
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self.rows = json.load(checkpoint_file)
+
+    def __getitem__(self, table):
+        progress = self.rows.get(table)
+        if not isinstance(progress, list):
+            return 0, 0  # Not started, or an offsetless old checkpoint
+        return tuple(progress)
+
+    def __setitem__(self, table, progress):
+        self.rows[table] = list(progress)
+        if self.path:
+            partial = self.path + '.part'
+            with open(partial, 'w') as checkpoint_file:
+                json.dump(self.rows, checkpoint_file)
+            os.replace(partial, self.path)
+
+    def remove(self):
+        """Forgets the progress once the import has finished."""
+
+        self.rows = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def _columns(table):
+    """Gets the (name, type) columns of a table."""
+
+    return dict(TABLES)[table]
+
+
+def _has_gold_ledger(connection):
+    """Checks if a database has the gold ledger table."""
+
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        ('gold_ledger', )
+    )
+    return cursor.fetchone() is not None
+
+
+def _convert(value, value_type):
+    """Converts a value read from a file to the column's type."""
+
+    if value is None or value == '':
+        return None
+    return value_type(value)
+
+
+def export_table(connection, table, stream, file_format='jsonl',
+                 batch_size=1000):
+    """Streams a table into a file object.
+
+    Args:
+        connection: Connection to the database
+        table: Name of the table to export
+        stream: Text file object to write to
+        file_format: Either 'jsonl' or 'csv'
+        batch_size: Rows fetched from the database at a time
+
+    The players' gold is exported with the gold ledger's uncompacted
+    entries added to it.
+
+    Returns:
+        Amount of rows exported
+    """
+
+    names = [name for name, _ in _columns(table)]
+    selected = list(names)
+    if table == 'players' and _has_gold_ledger(connection):
+        selected[names.index('gold')] = (
+            "gold+COALESCE((SELECT SUM(amount) FROM gold_ledger "
+            "WHERE gold_ledger.steamid=players.steamid), 0)"
+        )
+    cursor = connection.cursor()
+    cursor.arraysize = batch_size
+    cursor.execute('SELECT {0} FROM {1}'.format(', '.join(selected), table))
+    if file_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(names)
+        write = writer.writerow
+    else:
+        def write(row):
+            stream.write(json.dumps(dict(zip(names, row))) + '\n')
+    count = 0
+    rows = cursor.fetchmany()
+    while rows:
+        for row in rows:
+            write(row)
+        count += len(rows)
+        rows = cursor.fetchmany()
+    return count
+
+
+def _read_rows(stream, table, file_format, offset=0):
+    """Yields rows of a table from a binary file object.
+
+    Reading starts at a byte offset, so the rows before it are
+    skipped without being read. A CSV file's header is always
+    read from the start of the file.
+
+    Args:
+        stream: Binary file object to read from
+        table: Name of the table
+        file_format: Either 'jsonl' or 'csv'
+        offset: Byte offset of the first row to read, 0 for the start
+
+    Yields:
+        Tuples of a row as a tuple and the byte offset after the row
+    """
+
+    columns = _columns(table)
+    position = [offset]
+
+    def lines():
+        for line in iter(stream.readline, b''):
+            position[0] = stream.tell()
+            yield line.decode('utf-8')
+
+    if file_format == 'csv':
+        reader = csv.reader(lines())
+        names = next(reader, None)
+        if names is None:
+            return
+        if offset:
+            stream.seek(offset)
+        records = (dict(zip(names, values)) for values in reader if values)
+    else:
+        stream.seek(offset)
+        records = (json.loads(line) for line in lines() if line.strip())
+    for record in records:
+        yield tuple(
+            _convert(record.get(name), value_type)
+            for name, value_type in columns
+        ), position[0]
+
+
+def import_table(connection, table, stream, file_format='jsonl',
+                 batch_size=5000, checkpoint=None):
+    """Upserts rows from a file object into a table.
+
+    Rows are inserted in batches, one transaction per batch, replacing
+    existing rows with the same primary key. Replaced players' gold
+    ledger entries are deleted along with the rows.
+
+    Args:
+        connection: Connection to the database
+        table: Name of the table to import into
+        stream: Binary file object to read from
+        file_format: Either 'jsonl' or 'csv'
+        batch_size: Rows per transaction
+        checkpoint: Optional checkpoint to seek past committed rows
+            and to record the progress into
+
+    Returns:
+        Amount of rows imported
+    """
+
+    query = 'INSERT OR REPLACE INTO {0} VALUES ({1})'.format(
+        table, ', '.join('?' for _ in _columns(table))
+    )
+    ledger = table == 'players' and _has_gold_ledger(connection)
+    skip, offset = checkpoint[table] if checkpoint else (0, 0)
+    done = skip
+    batch = []
+    for row, offset in _read_rows(stream, table, file_format, offset):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _import_batch(connection, query, batch, ledger)
+            done += len(batch)
+            batch = []
+            if checkpoint:
+                checkpoint[table] = (done, offset)
+    if batch:
+        _import_batch(connection, query, batch, ledger)
+        done += len(batch)
+        if checkpoint:
+            checkpoint[table] = (done, offset)
+    return done - skip
+
+
+def _import_batch(connection, query, batch, ledger):
+    """Upserts a batch of rows in a single transaction.
+
+    Args:
+        connection: Connection to the database
+        query: Upsert query of the table
+        batch: Rows to upsert
+        ledger: Delete the gold ledger entries of the rows' steamids
+    """
+
+    with connection:
+        connection.executemany(query, batch)
+        if ledger:
+            connection.executemany(
+                "DELETE FROM gold_ledger WHERE steamid=?",
+                ((row[0], ) for row in batch)
+            )
+
+
+def _rebuild_player_stats(connection):
+    """Recalculates the total levels after heroes were imported."""
+
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        ('player_stats', )
+    )
+    if cursor.fetchone():
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO player_stats "
+                "SELECT steamid, SUM(level) FROM heroes GROUP BY steamid"
+            )
+
+
+def _table_path(directory, table, file_format):
+    """Gets the path of a table's file in a dump directory."""
+
+    return os.path.join(directory, '{0}.{1}'.format(table, file_format))
+
+
+def export_database(database_file, directory, file_format='jsonl',
+                    tables=None):
+    """Exports tables of a database into a directory.
+
+    Args:
+        database_file: Path to the database file
+        directory: Directory to write a file per table into
+        file_format: Either 'jsonl' or 'csv'
+        tables: Names of the tables to export, all by default
+
+    Returns:
+        Dictionary of table names and amounts of rows exported
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    connection = sqlite3.connect(database_file)
+    try:
+        for table, _ in TABLES:
+            if tables and table not in tables:
+                continue
+            path = _table_path(directory, table, file_format)
+            with open(path, 'w', newline='') as stream:
+                counts[table] = export_table(
+                    connection, table, stream, file_format)
+    finally:
+        connection.close()
+    return counts
+
+
+def import_database(database_file, directory, file_format='jsonl',
+                    tables=None, batch_size=5000, checkpoint_path=None):
+    """Imports tables from a directory into a database.
+
+    Args:
+        database_file: Path to the database file
+        directory: Directory containing a file per table
+        file_format: Either 'jsonl' or 'csv'
+        tables: Names of the tables to import, all by default
+        batch_size: Rows per transaction
+        checkpoint_path: Path to a checkpoint file for resuming,
+            removed once the import has finished
+
+    Returns:
+        Dictionary of table names and amounts of rows imported
+    """
+
+    checkpoint = _Checkpoint(checkpoint_path)
+    counts = {}
+    connection = sqlite3.connect(database_file)
+    try:
+        for table, _ in TABLES:
+            path = _table_path(directory, table, file_format)
+            if tables and table not in tables or not os.path.exists(path):
+                continue
+            with open(path, 'rb') as stream:
+                counts[table] = import_table(
+                    connection, table, stream, file_format,
+                    batch_size, checkpoint)
+        if 'heroes' in counts:  # Even if resumed with nothing left
+            _rebuild_player_stats(connection)
+        checkpoint.remove()
+    finally:
+        connection.close()
+    return counts
+
+
+def main(argv=None):
+    """Runs the tool from the command line."""
+
+    parser = argparse.ArgumentParser(
+        description='Import and export Hero Wars player data.')
+    parser.add_argument('action', choices=('export', 'import'))
+    parser.add_argument('database', help='Path to the database file')
+    parser.add_argument('directory', help='Directory of the table files')
+    parser.add_argument('--format', choices=FORMATS, default='jsonl')
+    parser.add_argument('--tables', nargs='+',
+                        choices=[table for table, _ in TABLES])
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--checkpoint', help='Checkpoint file for imports')
+    args = parser.parse_args(argv)
+
+    if args.action == 'export':
+        counts = export_database(
+            args.database, args.directory, args.format, args.tables)
+    else:
+        counts = import_database(
+            args.database, args.directory, args.format, args.tables,
+            args.batch_size, args.checkpoint)
+    for table, count in counts.items():
+        print('{0}: {1} rows'.format(table, count))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,185 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Hero Wars
+from herowars.configs import worker_threads
+from herowars.configs import worker_queue_size
+
+# Python
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Source.Python
+from listeners.tick.repeat import TickRepeat
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'QueueFullError',
+    'Task',
+    'WorkerPool',
+    'worker_pool'
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class QueueFullError(Exception):
+    """Raised when too many tasks are waiting in a worker pool."""
+
+
+class Task(object):
+    """Work submitted to a worker pool.
+
+    Attributes:
+        callback: Called with the result on the game thread
+        errback: Called with the exception on the game thread
+        owner: Object the task belongs to, usually a player
+        cancelled: Has the task been cancelled
+    """
+
+    def __init__(self, future, callback, errback, owner):
+        self.future = future
+        self.callback = callback
+        self.errback = errback
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancels the task.
+
+        A task that has already started keeps running, but its
+        callbacks are never called.
+        """
+
+        self.cancelled = True
+        self.future.cancel()
+
+
+class WorkerPool(object):
+    """Runs work off the game thread and delivers results back to it.
+
+    Skills submit functions to the pool, which runs them on worker
+    threads. The results are queued and passed to the callbacks on
+    the game thread from a tick repeat, so callbacks can safely touch
+    players and entities. Work should be pure Python or I/O that
+    doesn't touch the engine; note that pure Python work still shares
+    the interpreter lock with the game thread, the pool only keeps it
+    out of the event handlers.
+    """
+
+    def __init__(self, threads=worker_threads, max_queue=worker_queue_size):
+        """Initializes a new worker pool.
+
+        Args:
+            threads: Amount of worker threads
+            max_queue: Maximum amount of unfinished tasks
+        """
+
+        self.threads = threads
+        self.max_queue = max_queue
+        self._executor = None
+        self._tasks = set()
+        self._finished = deque()
+        self._tick_repeat = TickRepeat(self._deliver)
+
+    def start(self, interval=0.01):
+        """Starts the worker threads and the result delivery.
+
+        Args:
+            interval: Seconds between the deliveries
+        """
+
+        self._executor = ThreadPoolExecutor(
+            self.threads, thread_name_prefix='herowars')
+        self._tick_repeat.start(interval, 0)
+
+    def stop(self):
+        """Cancels every task and stops the pool."""
+
+        self._tick_repeat.stop()
+        for task in list(self._tasks):
+            task.cancel()
+        self._tasks.clear()
+        self._finished.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, function, *args, callback=None, errback=None,
+               owner=None, **kwargs):
+        """Submits a function to be run on a worker thread.
+
+        Args:
+            function: Function to run
+            *args, **kwargs: Arguments for the function
+            callback: Called with the function's result on the game thread
+            errback: Called with the raised exception on the game thread
+            owner: Object the task belongs to, see cancel_owner()
+
+        Returns:
+            The submitted Task
+
+        Raises:
+            QueueFullError: If max_queue tasks are already unfinished
+            RuntimeError: If the pool hasn't been started
+        """
+
+        if self._executor is None:
+            raise RuntimeError('The worker pool has not been started.')
+        if len(self._tasks) >= self.max_queue:
+            raise QueueFullError(
+                'Over {0} unfinished tasks.'.format(self.max_queue))
+        future = self._executor.submit(function, *args, **kwargs)
+        task = Task(future, callback, errback, owner)
+        self._tasks.add(task)
+        future.add_done_callback(lambda future: self._finished.append(task))
+        return task
+
+    def cancel_owner(self, owner):
+        """Cancels every task of an owner, e.g. a disconnecting player.
+
+        The tasks stay unfinished until they're delivered, so tasks
+        that already started still count towards max_queue.
+
+        Args:
+            owner: Owner whose tasks to cancel
+        """
+
+        for task in self._tasks:
+            if task.owner is owner:
+                task.cancel()
+
+    def _deliver(self):
+        """Passes the finished tasks' results to their callbacks."""
+
+        while self._finished:
+            task = self._finished.popleft()
+            self._tasks.discard(task)
+            if task.cancelled or task.future.cancelled():
+                continue
+            error = task.future.exception()
+            try:
+                if error is None:
+                    if task.callback:
+                        task.callback(task.future.result())
+                elif task.errback:
+                    task.errback(error)
+                else:
+                    raise error
+            except Exception as error:
+                print('[HW] Unhandled error in a worker task: {0!r}'.format(
+                    error))
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+worker_pool = WorkerPool()
\ No newline at end of file